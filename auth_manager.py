@@ -131,16 +131,8 @@ class AuthManager:
         Returns:
             是否可以访问
         """
-        # 如果是管理员，总是可以访问
-        if self.is_admin(user_id):
-            return True
-        
-        # 如果处于维护模式，只有管理员可以访问
-        if self.maintenance_mode:
-            return False
-        
-        # 不处于维护模式，所有用户都可以访问
-        return True
+        # 不处于维护模式时所有用户都可以访问，否则只有管理员可以访问
+        return not self.maintenance_mode or user_id in self.admins
     
     def get_admins(self) -> List[str]:
         """
@@ -36,6 +36,9 @@ BOTPY_IS_SANDBOX = os.getenv("BOTPY_IS_SANDBOX", "false").lower() == "true"
 
 # 统计系统配置
 STATS_MAX_MONTHS = int(os.getenv("STATS_MAX_MONTHS", "12"))
+STATS_MAX_WEEKS = int(os.getenv("STATS_MAX_WEEKS", "26"))  # 周统计保留周数
+STATS_MAX_DAYS = int(os.getenv("STATS_MAX_DAYS", "90"))  # 日统计保留天数
+STATS_FLUSH_INTERVAL = float(os.getenv("STATS_FLUSH_INTERVAL", "5"))  # 统计数据合并写入的间隔（秒）
 
 # 黑名单功能配置
 ENABLE_BLACKLIST = os.getenv("ENABLE_BLACKLIST", "true").lower() == "true"
@@ -44,6 +44,11 @@ class EventType(Enum):
     C2C_MSG_REJECT = "C2C_MSG_REJECT"
     C2C_MSG_RECEIVE = "C2C_MSG_RECEIVE"
 
+# 已知事件类型的取值集合
+EVENT_TYPE_VALUES = frozenset(e.value for e in EventType)
+PRIVATE_EVENT_TYPES = frozenset({EventType.DIRECT_MESSAGE_CREATE, EventType.C2C_MESSAGE_CREATE})
+AT_EVENT_TYPES = frozenset({EventType.AT_MESSAGE_CREATE, EventType.GROUP_AT_MESSAGE_CREATE})
+
 @dataclass
 class EnhancedUser:
     """增强的用户信息"""
@@ -101,7 +106,7 @@ class EnhancedMessage:
             guild_id=event_data.get("guild_id"),
             group_openid=event_data.get("group_openid"),
             timestamp=event_data.get("timestamp"),
-            event_type=EventType(event_type) if event_type in [e.value for e in EventType] else None,
+            event_type=EventType(event_type) if event_type in EVENT_TYPE_VALUES else None,
             message_type=MessageType(event_data.get("msg_type", 0)),
             attachments=event_data.get("attachments", []),
             mentions=event_data.get("mentions", [])
@@ -113,11 +118,11 @@ class EnhancedMessage:
     
     def is_private_message(self) -> bool:
         """判断是否为私聊消息"""
-        return self.event_type in [EventType.DIRECT_MESSAGE_CREATE, EventType.C2C_MESSAGE_CREATE]
+        return self.event_type in PRIVATE_EVENT_TYPES
     
     def is_at_message(self) -> bool:
         """判断是否为@消息"""
-        return self.event_type in [EventType.AT_MESSAGE_CREATE, EventType.GROUP_AT_MESSAGE_CREATE]
+        return self.event_type in AT_EVENT_TYPES
     
     def get_reply_target(self) -> tuple[Optional[str], bool]:
         """获取回复目标，返回(target_id, is_group)"""
@@ -24,6 +24,11 @@ ENABLE_AI_CHAT = os.environ.get("ENABLE_AI_CHAT", "true").lower() == "true"
 AI_CHAT_MENTION_TRIGGER = os.environ.get("AI_CHAT_MENTION_TRIGGER", "true").lower() == "true"
 ENFORCE_COMMAND_PREFIX = os.environ.get("ENFORCE_COMMAND_PREFIX", "true").lower() == "true"
 
+# 事件类型分组
+AT_MESSAGE_EVENTS = frozenset({"AT_MESSAGE_CREATE", "GROUP_AT_MESSAGE_CREATE"})
+DIRECT_MESSAGE_EVENTS = frozenset({"DIRECT_MESSAGE_CREATE", "C2C_MESSAGE_CREATE"})
+REPLYABLE_MESSAGE_EVENTS = AT_MESSAGE_EVENTS | DIRECT_MESSAGE_EVENTS
+
 class EventHandler:
     """
     事件处理器：处理QQ机器人的各类事件
@@ -126,6 +131,18 @@ class EventHandler:
             self.logger.info(f"暂未支持的事件类型: {event_type}")
             return False
     
+    def _record_message_stats(self, user_id, group_openid=None):
+        """记录消息相关的用户和群组统计数据"""
+        try:
+            if user_id:
+                stats_manager.add_user(user_id)
+            if group_openid:
+                stats_manager.add_group(group_openid)
+                if user_id:
+                    stats_manager.add_user_to_group(group_openid, user_id)
+        except Exception as e:
+            self.logger.error(f"记录消息统计数据时出错: {e}")
+    
     def _get_user_id(self, data):
         """从事件数据中提取用户ID (优先author.id，然后是openid)"""
         author = data.get("author", {})
@@ -218,6 +235,10 @@ class EventHandler:
             return user_openid, False
         return None, False
 
+    def _log_command_soon(self, command: str, user_id: str, group_openid: str = None):
+        """在下一轮事件循环中记录命令使用统计，不阻塞命令处理"""
+        asyncio.get_running_loop().call_soon(stats_manager.log_command, command, user_id, group_openid)
+
     async def _run_plugin_and_reply(self, plugin, params: str, user_id: str, event_data: dict):
         """在后台运行插件并处理回复"""
         response = None
@@ -277,7 +298,7 @@ class EventHandler:
 
     async def handle_at_message(self, data):
         """处理频道@消息"""
-        self.logger.info(f"收到@消息: {data}")
+        self.logger.debug("收到@消息: %s", data)
         # 设置事件类型，确保黑名单检查能正确识别
         data["type"] = "AT_MESSAGE_CREATE"
         content = data.get("content", "")
@@ -300,22 +321,22 @@ class EventHandler:
 
     async def handle_direct_message(self, data):
         """处理私聊消息 (包括C2C)"""
-        self.logger.info(f"收到私聊/C2C消息: {data}")
+        self.logger.debug("收到私聊/C2C消息: %s", data)
         # 设置事件类型，确保黑名单检查能正确识别
         data["type"] = "DIRECT_MESSAGE_CREATE"
         content = data.get("content", "")
         user_id = self._get_user_id(data)
 
-        # 记录用户统计数据
+        # 记录用户统计数据，排在命令处理之后执行
         if user_id:
-            stats_manager.add_user(user_id)
+            asyncio.get_running_loop().call_soon(self._record_message_stats, user_id)
 
         await self._process_command(content, data, user_id)
         return True
 
     async def handle_c2c_message(self, data):
         """处理单聊(C2C)消息 - 实际上会被 handle_direct_message 接管"""
-        self.logger.info(f"收到C2C消息 (将被转发给私聊处理): {data}")
+        self.logger.debug("收到C2C消息 (将被转发给私聊处理): %s", data)
         # 设置事件类型，确保黑名单检查能正确识别
         data["type"] = "C2C_MESSAGE_CREATE"
         await self.handle_direct_message(data)
@@ -323,20 +344,15 @@ class EventHandler:
 
     async def handle_group_at_message(self, data):
         """处理群聊@消息"""
-        self.logger.info(f"收到群聊@消息: {data}")
+        self.logger.debug("收到群聊@消息: %s", data)
         # 设置事件类型，确保黑名单检查能正确识别
         data["type"] = "GROUP_AT_MESSAGE_CREATE"
         content = data.get("content", "")
         user_id = self._get_user_id(data)
         group_openid = data.get("group_openid")
         
-        # 记录用户和群组统计数据
-        if user_id:
-            stats_manager.add_user(user_id)
-        if group_openid:
-            stats_manager.add_group(group_openid)
-            if user_id:
-                stats_manager.add_user_to_group(group_openid, user_id)
+        # 记录用户和群组统计数据，排在命令处理之后执行
+        asyncio.get_running_loop().call_soon(self._record_message_stats, user_id, group_openid)
         
         clean_content = re.sub(r'<@!\d+>', '', content).strip()
         clean_content = re.sub(r'@[\w\u4e00-\u9fa5]+\s*', '', clean_content).strip()
@@ -375,7 +391,7 @@ class EventHandler:
             event_type = data.get("type")
             self.logger.info(f"事件类型: {event_type}")
 
-            if event_type in ["DIRECT_MESSAGE_CREATE", "C2C_MESSAGE_CREATE", "AT_MESSAGE_CREATE", "GROUP_AT_MESSAGE_CREATE"]:
+            if event_type in REPLYABLE_MESSAGE_EVENTS:
                 self.logger.info(f"事件类型匹配，检查发送条件: block_reason={bool(block_reason)}, BLACKLIST_SHOW_REASON={BLACKLIST_SHOW_REASON}")
 
                 if block_reason and BLACKLIST_SHOW_REASON:
@@ -403,8 +419,8 @@ class EventHandler:
 
         clean_content = re.sub(r'<@!\d+>', '', content).strip()
         event_type = data.get("type")
-        is_at_message = event_type in ["AT_MESSAGE_CREATE", "GROUP_AT_MESSAGE_CREATE"]
-        is_direct_message = event_type in ["DIRECT_MESSAGE_CREATE", "C2C_MESSAGE_CREATE"]
+        is_at_message = event_type in AT_MESSAGE_EVENTS
+        is_direct_message = event_type in DIRECT_MESSAGE_EVENTS
 
         # 如果不是@消息、私聊消息，且内容不以/开头，则忽略 (避免处理普通群聊消息)
         if not is_at_message and not is_direct_message and not clean_content.startswith('/'):
@@ -431,7 +447,7 @@ class EventHandler:
             return False # 其他情况（如空内容的普通群消息）不处理
 
         # 检查维护模式
-        if auth_manager.is_maintenance_mode() and not auth_manager.is_admin(user_id):
+        if auth_manager.maintenance_mode and user_id not in auth_manager.admins:
             response = "机器人当前处于维护模式，仅管理员可用"
             message_id = data.get("id")
             target_id, is_group = self._get_channel_id(data)
@@ -490,26 +506,23 @@ class EventHandler:
         
         response_to_send = None # 用于存储需要直接发送的响应 (help 或 not found)
         
-        # 记录命令使用统计
-        if plugin:
-            group_openid = data.get("group_openid")
-            stats_manager.log_command(plugin.command, user_id, group_openid)
-            
         if plugin:
             # 找到插件，启动后台任务处理
             self.logger.info(f"为命令 '{command}' 找到插件 '{plugin.__class__.__name__}'，创建后台处理任务")
             asyncio.create_task(self._run_plugin_and_reply(plugin, params, user_id, data))
+            # 记录命令使用统计，排在插件任务之后执行
+            self._log_command_soon(plugin.command, user_id, data.get("group_openid"))
             return True # 表示已开始处理
         elif command.lower() == "/help":
             # 特殊处理 /help 命令
             self.logger.info("处理内置 /help 命令")
             response_to_send = plugin_manager.get_help()
             # 记录help命令使用
-            stats_manager.log_command("help", user_id, data.get("group_openid"))
+            self._log_command_soon("help", user_id, data.get("group_openid"))
         else:
             # 未找到插件，也不是 /help
              self.logger.warning(f"未找到命令 '{command}'")
-             response_to_send = f"未找到命令\n你可以通过 /help 获取可用命令列表"
+             response_to_send = plugin_manager.unknown_command_message(command)
 
         # 如果有直接响应需要发送 (help 或 not found)
         if response_to_send:
@@ -538,7 +551,7 @@ class EventHandler:
     def _is_private_message(self, event_type: Optional[str], target_id: str) -> bool:
         """判断是否为私聊消息"""
         # 明确的私聊事件类型
-        if event_type in ["DIRECT_MESSAGE_CREATE", "C2C_MESSAGE_CREATE"]:
+        if event_type in DIRECT_MESSAGE_EVENTS:
             return True
 
         # 如果target_id看起来像用户openid（通常是长字符串），且不是频道ID格式
@@ -620,7 +633,7 @@ class EventHandler:
         group = stats_manager.get_group(group_openid)
         if group:
             group["can_send_proactive_msg"] = False
-            stats_manager._save_data()
+            stats_manager._save_data("groups")
             return True
         return False
     
@@ -636,7 +649,7 @@ class EventHandler:
         group = stats_manager.get_group(group_openid)
         if group:
             group["can_send_proactive_msg"] = True
-            stats_manager._save_data()
+            stats_manager._save_data("groups")
             return True
         return False
     
@@ -678,7 +691,7 @@ class EventHandler:
         user = stats_manager.get_user(user_openid)
         if user:
             user["can_send_proactive_msg"] = False
-            stats_manager._save_data()
+            stats_manager._save_data("users")
             return True
         return False
     
@@ -694,7 +707,7 @@ class EventHandler:
         user = stats_manager.get_user(user_openid)
         if user:
             user["can_send_proactive_msg"] = True
-            stats_manager._save_data()
+            stats_manager._save_data("users")
             return True
         return False
 
@@ -3,11 +3,8 @@ import asyncio
 import logging
 import logging.config
 from config import BOT_APPID, BOT_APPSECRET, BOT_TOKEN, COMM_MODE, USE_BOTPY_CLIENT
-from websocket_client import ws_client
-from webhook_server import webhook_server
 from plugins.plugin_manager import plugin_manager
 from auth_manager import auth_manager
-from stats_manager import stats_manager
 from event_handler import event_handler
 from plugins.hiklqqbot_admin_plugin import HiklqqbotAdminPlugin
 from plugins.hiklqqbot_maintenance_plugin import HiklqqbotMaintenancePlugin
@@ -74,6 +71,8 @@ def check_env():
 async def start_websocket_client():
     """启动WebSocket客户端"""
     logger.info("使用WebSocket模式启动QQ机器人...")
+    # 按通信模式延迟导入，未使用的传输层及其依赖不会被加载
+    from websocket_client import ws_client
     max_restart_attempts = 5
     restart_attempts = 0
     restart_delay = 10  # 初始重启延迟（秒）
@@ -107,6 +106,8 @@ async def start_websocket_client():
 async def start_webhook_server():
     """启动Webhook服务器"""
     logger.info("使用Webhook模式启动QQ机器人...")
+    # 按通信模式延迟导入，未使用的传输层及其依赖不会被加载
+    from webhook_server import webhook_server
     try:
         # 启动Webhook服务器
         await webhook_server.start()
@@ -157,23 +158,21 @@ async def start_botpy_websocket_client():
 
     logger.info("Botpy客户端已停止")
 
-def init_stats_system():
-    """初始化统计系统"""
-    logger.info("正在初始化统计系统...")
-    # 确保stats_manager已初始化
-    _ = stats_manager.initialized
-    logger.info("统计系统已初始化")
-
 def register_builtin_plugins():
     """
-    注册系统内置插件
+    注册系统内置插件，已由插件加载器注册的不再重复实例化
     """
-    plugin_manager.register_plugin(HiklqqbotAdminPlugin())
-    plugin_manager.register_plugin(HiklqqbotMaintenancePlugin())
-    plugin_manager.register_plugin(HiklqqbotUseridPlugin())
-    plugin_manager.register_plugin(HiklqqbotReloadPlugin())
-    plugin_manager.register_plugin(HiklqqbotStatsPlugin())  # 注册统计插件
-    plugin_manager.register_plugin(HiklqqbotBlacklistPlugin())  # 注册黑名单插件
+    loaded = {type(plugin) for plugin in plugin_manager.plugins.values()}
+    for plugin_class in (
+        HiklqqbotAdminPlugin,
+        HiklqqbotMaintenancePlugin,
+        HiklqqbotUseridPlugin,
+        HiklqqbotReloadPlugin,
+        HiklqqbotStatsPlugin,  # 统计插件
+        HiklqqbotBlacklistPlugin,  # 黑名单插件
+    ):
+        if plugin_class not in loaded:
+            plugin_manager.register_plugin(plugin_class())
 
 async def main_async():
     """异步主程序"""
@@ -183,8 +182,9 @@ async def main_async():
     if not check_env():
         return
     
-    # 初始化统计系统
-    init_stats_system()
+    # Python 3.12+ 使用即时任务工厂：任务创建时立即开始执行，未挂起就完成的任务不再经过事件循环调度
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
     
     # 加载所有插件
     logger.info("正在加载插件...")
@@ -223,6 +223,15 @@ async def main_async():
 
 def main():
     """程序入口"""
+    # 安装了 uvloop 时使用其事件循环，未安装（或Windows平台）时使用默认事件循环
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("使用 uvloop 事件循环")
+    
     try:
         asyncio.run(main_async())
     except KeyboardInterrupt:
@@ -9,6 +9,10 @@ class BasePlugin(ABC):
     插件基类，所有插件都应该继承这个类
     """
     
+    # 基类属性使用槽存储；子类应声明自己的 __slots__（没有新增属性时为空元组），
+    # 否则实例仍会带有 __dict__
+    __slots__ = ("command", "description", "is_builtin", "hidden", "logger")
+    
     def __init__(self, command: str, description: str, is_builtin: bool = False, hidden: bool = False):
         """
         初始化插件
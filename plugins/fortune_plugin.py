@@ -16,6 +16,8 @@ class FortunePlugin(BasePlugin):
     4. 自动清理过期运势记录，默认只保留30天内的记录
     """
     
+    __slots__ = ("data_dir", "fortune_file", "fortune_levels", "fortune_records", "record_keep_days")
+    
     def __init__(self):
         super().__init__(command="运势", description="查看今日运势，返回1-100的幸运指数", is_builtin=False)
         self.logger = logging.getLogger("plugin.fortune")
@@ -184,4 +186,7 @@ class FortunePlugin(BasePlugin):
         result = f"✨ 今日运势: {fortune_value}\n"
         result += f"💫 运势评价: {fortune_desc}\n"
         
-        return result 
\ No newline at end of file
+        return result
+
+# 供插件管理器直接获取插件类
+__plugin__ = FortunePlugin
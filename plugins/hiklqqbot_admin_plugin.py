@@ -9,6 +9,8 @@ class HiklqqbotAdminPlugin(BasePlugin):
     管理员管理插件，用于添加/删除/查看管理员
     """
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(
             command="hiklqqbot_admin", 
@@ -96,4 +98,7 @@ class HiklqqbotAdminPlugin(BasePlugin):
 - add <用户ID>: 添加管理员
 - remove <用户ID>: 删除管理员
 - reload: 重新加载管理员列表
-- 无参数: 显示当前管理员列表""" 
\ No newline at end of file
+- 无参数: 显示当前管理员列表"""
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotAdminPlugin
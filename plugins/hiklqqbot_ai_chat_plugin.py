@@ -8,6 +8,7 @@ import re
 from typing import Dict, List, Optional, Any, Union
 
 from plugins.base_plugin import BasePlugin
+from plugins.plugin_manager import plugin_manager
 from auth_manager import auth_manager
 from message import MessageSender
 
@@ -52,6 +53,8 @@ if ENABLE_AI_CHAT:
         AI聊天插件，实现ChatGPT风格的聊天功能
         """
         
+        __slots__ = ("ai_chat_enabled", "at_trigger_enabled", "chat_history", "data_dir", "rate_limit_records", "user_last_activity", "user_sessions")
+        
         def __init__(self, logger=None):
             """初始化AI聊天插件"""
             # 调用父类初始化方法设置命令属性
@@ -1062,6 +1065,8 @@ if ENABLE_AI_CHAT:
             """根据配置更新插件的可见性"""
             # 更新插件的hidden属性，只有当AI聊天和@触发都启用时才显示
             self.hidden = not (ENABLE_AI_CHAT and AI_CHAT_MENTION_TRIGGER)
+            # 可见性变化后清除帮助文本缓存
+            plugin_manager.invalidate_caches()
             self.logger.info(f"已更新AI聊天@触发插件可见性: {'可见' if not self.hidden else '隐藏'}")
             return self.hidden
         
@@ -1110,6 +1115,8 @@ if ENABLE_AI_CHAT:
         AI聊天@触发设置插件
         """
         
+        __slots__ = ("ai_chat",)
+        
         def __init__(self):
             super().__init__(
                 command="ai_mention", 
@@ -1184,6 +1191,8 @@ if ENABLE_AI_CHAT:
             """根据配置更新插件的可见性"""
             # 更新插件的hidden属性，只有当AI聊天和@触发都启用时才显示
             self.hidden = not (ENABLE_AI_CHAT and AI_CHAT_MENTION_TRIGGER)
+            # 可见性变化后清除帮助文本缓存
+            plugin_manager.invalidate_caches()
             self.logger.info(f"已更新AI聊天@触发插件可见性: {'可见' if not self.hidden else '隐藏'}")
             return self.hidden
             
@@ -1214,6 +1223,8 @@ if ENABLE_AI_CHAT:
         AI聊天帮助插件
         """
         
+        __slots__ = ("ai_chat",)
+        
         def __init__(self):
             super().__init__(
                 command="chat_help", 
@@ -1285,6 +1296,8 @@ if ENABLE_AI_CHAT:
             """根据配置更新插件的可见性"""
             # 更新插件的hidden属性，只有当AI聊天功能启用时才显示
             self.hidden = not ENABLE_AI_CHAT
+            # 可见性变化后清除帮助文本缓存
+            plugin_manager.invalidate_caches()
             self.logger.info(f"已更新AI聊天帮助插件可见性: {'可见' if not self.hidden else '隐藏'}")
             return self.hidden
             
@@ -1306,6 +1319,7 @@ if ENABLE_AI_CHAT:
 
 # 如果AI聊天功能启用，导出插件类以便插件管理器发现并加载
 if ENABLE_AI_CHAT:
-    __all__ = ["AIChatPlugin", "AIChatMentionPlugin", "AIChatHelpPlugin"] 
+    __all__ = ["AIChatPlugin", "AIChatMentionPlugin", "AIChatHelpPlugin"]
+    __plugin__ = (AIChatPlugin, AIChatMentionPlugin, AIChatHelpPlugin)
 else:
     logger.info("AI聊天功能已禁用，不加载AI聊天插件") 
@@ -15,6 +15,8 @@ logger = logging.getLogger("hiklqqbot_blacklist_plugin")
 class HiklqqbotBlacklistPlugin(BasePlugin):
     """黑名单管理插件"""
 
+    __slots__ = ("author", "name", "version")
+
     def __init__(self):
         super().__init__(
             command="hiklqqbot_blacklist",
@@ -262,3 +264,6 @@ class HiklqqbotBlacklistPlugin(BasePlugin):
             
         except (ValueError, IndexError):
             return None
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotBlacklistPlugin
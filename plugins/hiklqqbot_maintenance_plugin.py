@@ -7,6 +7,8 @@ class HiklqqbotMaintenancePlugin(BasePlugin):
     维护模式管理插件，仅管理员可用
     """
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(
             command="hiklqqbot_maintenance", 
@@ -46,4 +48,7 @@ class HiklqqbotMaintenancePlugin(BasePlugin):
             auth_manager.set_maintenance_mode(False)
             return "维护模式已禁用，所有用户可与机器人交互"
         else:
-            return "参数无效，请使用 on 或 off" 
\ No newline at end of file
+            return "参数无效，请使用 on 或 off"
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotMaintenancePlugin
@@ -8,6 +8,8 @@ class HiklqqbotPingPlugin(BasePlugin):
     Ping命令插件，用于测试机器人是否在线以及响应速度
     """
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(command="hiklqqbot_ping", description="测试机器人是否在线 (仅管理员可用)", is_builtin=True)
         self.logger = logging.getLogger("plugin.ping")
@@ -32,4 +34,7 @@ class HiklqqbotPingPlugin(BasePlugin):
             return "您没有权限执行此命令，请联系管理员"
             
         current_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        return f"pong! (响应时间: {current_time})" 
\ No newline at end of file
+        return f"pong! (响应时间: {current_time})"
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotPingPlugin
@@ -10,6 +10,8 @@ class HiklqqbotReloadPlugin(BasePlugin):
     热重载插件，用于在运行时重新加载所有插件
     """
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(command="hiklqqbot_reload", description="重新加载所有插件 (仅管理员可用)", is_builtin=True)
         self.logger = logging.getLogger("plugin.reload")
@@ -50,6 +52,7 @@ class HiklqqbotReloadPlugin(BasePlugin):
             # 清空插件列表
             old_plugins = plugin_manager.plugins.copy()
             plugin_manager.plugins.clear()
+            plugin_manager.invalidate_caches()
             
             # 保留当前reload插件
             reload_plugin = old_plugins.get('/hiklqqbot_reload')
@@ -128,4 +131,8 @@ class HiklqqbotReloadPlugin(BasePlugin):
                     # 更新插件内部的命令属性
                     plugin.command = normalized_cmd
         
-        self.logger.info(f"命令标准化完成，共有 {len(plugins_by_name)} 个唯一插件")
\ No newline at end of file
+        plugin_manager.invalidate_caches()
+        self.logger.info(f"命令标准化完成，共有 {len(plugins_by_name)} 个唯一插件")
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotReloadPlugin
@@ -3,15 +3,24 @@ from stats_manager import stats_manager
 from auth_manager import auth_manager
 import logging
 import json
+import heapq
 from datetime import datetime, timedelta
 import time
 
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _fmt_ts(ts: float) -> str:
+    """将时间戳格式化为 YYYY-MM-DD HH:MM:SS"""
+    return time.strftime(TIME_FORMAT, time.localtime(ts))
+
 class HiklqqbotStatsPlugin(BasePlugin):
     """
     统计数据管理插件：用于查看和管理机器人的统计数据
     仅限管理员使用
     """
     
+    __slots__ = ("_response_cache", "cache_hits", "cache_misses", "cache_ttl", "subcommands", "uncached_subcommands")
+    
     def __init__(self):
         super().__init__(
             command="hiklqqbot_stats", 
@@ -34,6 +43,13 @@ class HiklqqbotStatsPlugin(BasePlugin):
             "lookup": self._handle_id_lookup,
             "help": self._handle_help
         }
+        
+        # 格式化结果缓存 {(子命令, 参数): (生成时间, 结果)}
+        self.cache_ttl = 15.0
+        self.uncached_subcommands = {"help", "group", "user", "lookup"}
+        self._response_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     async def handle(self, params: str, user_id: str = None, group_openid: str = None, **kwargs) -> str:
         """
@@ -50,14 +66,28 @@ class HiklqqbotStatsPlugin(BasePlugin):
         subcommand = parts[0].lower() if parts else "help"
         subparams = parts[1] if len(parts) > 1 else ""
         
-        # 如果没有子命令，显示帮助
-        if not subcommand:
-            return await self._handle_help(subparams)
-        
         # 执行对应的子命令处理函数
         handler = self.subcommands.get(subcommand)
         if handler:
-            return await handler(subparams)
+            if subcommand in self.uncached_subcommands:
+                return await handler(subparams)
+            
+            # 短时间内重复查询直接返回缓存结果
+            cache_key = (subcommand, subparams.strip())
+            now = time.time()
+            cached = self._response_cache.get(cache_key)
+            if cached and now - cached[0] < self.cache_ttl:
+                self.cache_hits += 1
+                return cached[1]
+            
+            self.cache_misses += 1
+            self._response_cache = {
+                key: value for key, value in self._response_cache.items()
+                if now - value[0] < self.cache_ttl
+            }
+            result = await handler(subparams)
+            self._response_cache[cache_key] = (now, result)
+            return result
         else:
             return f"未知的子命令: {subcommand}\n输入 'hiklqqbot_stats help' 获取帮助"
     
@@ -91,25 +121,26 @@ class HiklqqbotStatsPlugin(BasePlugin):
                 return "当前没有记录的群组"
             
             # 按最后活跃时间排序
-            sorted_groups = sorted(
-                groups.items(), 
-                key=lambda x: x[1].get("last_active", 0), 
-                reverse=True
-            )[:limit]
+            sorted_groups = heapq.nlargest(
+                limit,
+                groups.items(),
+                key=lambda x: x[1].get("last_active", 0)
+            )
             
             result = f"群组列表 (总计: {len(groups)}, 显示: {min(limit, len(groups))}):\n\n"
             
+            # 使用展示ID代替真实ID
+            group_displays = stats_manager.get_display_ids([gid for gid, _ in sorted_groups], "groups")
             for i, (group_id, group_info) in enumerate(sorted_groups, 1):
-                # 使用展示ID代替真实ID
-                display_id = stats_manager.get_group_display_id(group_id)
-                join_time = datetime.fromtimestamp(group_info.get("join_time", 0))
-                last_active = datetime.fromtimestamp(group_info.get("last_active", 0))
+                display_id = group_displays[group_id]
+                join_time = _fmt_ts(group_info.get("join_time", 0))
+                last_active = _fmt_ts(group_info.get("last_active", 0))
                 member_count = len(group_info.get("members", []))
                 
                 result += f"{i}. 群ID: {display_id}\n"
                 result += f"   成员数: {member_count} 人\n"
-                result += f"   加入时间: {join_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                result += f"   最后活跃: {last_active.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                result += f"   加入时间: {join_time}\n"
+                result += f"   最后活跃: {last_active}\n\n"
             
             return result
         except Exception as e:
@@ -128,23 +159,24 @@ class HiklqqbotStatsPlugin(BasePlugin):
                 return "当前没有记录的用户"
             
             # 按最后活跃时间排序
-            sorted_users = sorted(
-                users.items(), 
-                key=lambda x: x[1].get("last_active", 0), 
-                reverse=True
-            )[:limit]
+            sorted_users = heapq.nlargest(
+                limit,
+                users.items(),
+                key=lambda x: x[1].get("last_active", 0)
+            )
             
             result = f"用户列表 (总计: {len(users)}, 显示: {min(limit, len(users))}):\n\n"
             
+            # 使用展示ID代替真实ID
+            user_displays = stats_manager.get_display_ids([uid for uid, _ in sorted_users], "users")
             for i, (user_id, user_info) in enumerate(sorted_users, 1):
-                # 使用展示ID代替真实ID
-                display_id = stats_manager.get_user_display_id(user_id)
-                first_seen = datetime.fromtimestamp(user_info.get("first_seen", 0))
-                last_active = datetime.fromtimestamp(user_info.get("last_active", 0))
+                display_id = user_displays[user_id]
+                first_seen = _fmt_ts(user_info.get("first_seen", 0))
+                last_active = _fmt_ts(user_info.get("last_active", 0))
                 
                 result += f"{i}. 用户ID: {display_id}\n"
-                result += f"   首次见到: {first_seen.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                result += f"   最后活跃: {last_active.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                result += f"   首次见到: {first_seen}\n"
+                result += f"   最后活跃: {last_active}\n\n"
             
             return result
         except Exception as e:
@@ -158,40 +190,48 @@ class HiklqqbotStatsPlugin(BasePlugin):
             
             # 命令使用统计
             command_stats = usage_stats.get("commands", {})
-            sorted_commands = sorted(
-                command_stats.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:10]
+            sorted_commands = heapq.nlargest(
+                10,
+                command_stats.items(),
+                key=lambda x: x[1]
+            )
             
             # 最活跃群组
             active_groups_raw = stats_manager.get_most_active_groups(5)
-            active_groups = [(stats_manager.get_group_display_id(gid), count) for gid, count in active_groups_raw]
+            group_displays = stats_manager.get_display_ids([gid for gid, _ in active_groups_raw], "groups")
+            active_groups = [(group_displays[gid], count) for gid, count in active_groups_raw]
             
             # 最活跃用户
             active_users_raw = stats_manager.get_most_active_users(5)
-            active_users = [(stats_manager.get_user_display_id(uid), count) for uid, count in active_users_raw]
+            user_displays = stats_manager.get_display_ids([uid for uid, _ in active_users_raw], "users")
+            active_users = [(user_displays[uid], count) for uid, count in active_users_raw]
             
             result = "命令使用统计:\n\n"
             
             # 总体统计
             result += f"总消息数: {usage_stats.get('total_messages', 0)}\n"
-            result += f"总命令数: {sum(command_stats.values())}\n"
+            result += f"总命令数: {stats_manager.get_total_commands()}\n"
             result += f"记录群组数: {len(stats_manager.get_all_groups())}\n"
             result += f"记录用户数: {len(stats_manager.get_all_users())}\n\n"
             
             # 最常用命令
             result += "最常用命令 (Top 10):\n"
-            for i, (cmd, count) in enumerate(sorted_commands, 1):
-                result += f"{i}. {cmd}: {count} 次\n"
+            result += "".join(
+                f"{i}. {cmd}: {count} 次\n"
+                for i, (cmd, count) in enumerate(sorted_commands, 1)
+            )
             
             result += "\n最活跃群组 (Top 5):\n"
-            for i, (group_id, count) in enumerate(active_groups, 1):
-                result += f"{i}. 群ID: {group_id}: {count} 条消息\n"
+            result += "".join(
+                f"{i}. 群ID: {group_id}: {count} 条消息\n"
+                for i, (group_id, count) in enumerate(active_groups, 1)
+            )
             
             result += "\n最活跃用户 (Top 5):\n"
-            for i, (user_id, count) in enumerate(active_users, 1):
-                result += f"{i}. 用户ID: {user_id}: {count} 条消息\n"
+            result += "".join(
+                f"{i}. 用户ID: {user_id}: {count} 条消息\n"
+                for i, (user_id, count) in enumerate(active_users, 1)
+            )
             
             return result
         except Exception as e:
@@ -218,11 +258,11 @@ class HiklqqbotStatsPlugin(BasePlugin):
             result = f"群组详细信息 ({display_id}):\n\n"
             
             # 基本信息
-            join_time = datetime.fromtimestamp(group_info.get("join_time", 0))
-            result += f"加入时间: {join_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            join_time = _fmt_ts(group_info.get("join_time", 0))
+            result += f"加入时间: {join_time}\n"
             
-            last_active = datetime.fromtimestamp(group_info.get("last_active", 0))
-            result += f"最后活跃: {last_active.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            last_active = _fmt_ts(group_info.get("last_active", 0))
+            result += f"最后活跃: {last_active}\n"
             
             # 添加者信息
             added_by = group_info.get("added_by")
@@ -237,9 +277,10 @@ class HiklqqbotStatsPlugin(BasePlugin):
             # 显示部分成员信息 - 使用展示ID
             if members:
                 result += "\n成员ID列表 (最多显示10个):\n"
-                for i, member_id in enumerate(members[:10], 1):
-                    member_display = stats_manager.get_user_display_id(member_id)
-                    result += f"{i}. {member_display}\n"
+                shown_members = sorted(members)[:10]
+                member_displays = stats_manager.get_display_ids(shown_members, "users")
+                for i, member_id in enumerate(shown_members, 1):
+                    result += f"{i}. {member_displays[member_id]}\n"
                 
                 if len(members) > 10:
                     result += f"...以及其他 {len(members) - 10} 名成员"
@@ -269,11 +310,11 @@ class HiklqqbotStatsPlugin(BasePlugin):
             result = f"用户详细信息 ({display_id}):\n\n"
             
             # 基本信息
-            first_seen = datetime.fromtimestamp(user_info.get("first_seen", 0))
-            result += f"首次见到: {first_seen.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            first_seen = _fmt_ts(user_info.get("first_seen", 0))
+            result += f"首次见到: {first_seen}\n"
             
-            last_active = datetime.fromtimestamp(user_info.get("last_active", 0))
-            result += f"最后活跃: {last_active.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            last_active = _fmt_ts(user_info.get("last_active", 0))
+            result += f"最后活跃: {last_active}\n"
             
             # 头像信息
             avatar = user_info.get("avatar")
@@ -293,9 +334,10 @@ class HiklqqbotStatsPlugin(BasePlugin):
             
             if user_groups:
                 result += "\n所在群组ID列表:\n"
-                for i, group_id in enumerate(user_groups[:5], 1):
-                    group_display = stats_manager.get_group_display_id(group_id)
-                    result += f"{i}. {group_display}\n"
+                shown_groups = sorted(user_groups)[:5]
+                group_displays = stats_manager.get_display_ids(shown_groups, "groups")
+                for i, group_id in enumerate(shown_groups, 1):
+                    result += f"{i}. {group_displays[group_id]}\n"
                 
                 if len(user_groups) > 5:
                     result += f"...以及其他 {len(user_groups) - 5} 个群组"
@@ -316,8 +358,10 @@ class HiklqqbotStatsPlugin(BasePlugin):
                 except ValueError:
                     return "日期格式错误，请使用 YYYY-MM-DD 格式，例如: hiklqqbot_stats daily 2023-05-01"
             
+            # 统一使用统计管理器的当前时间键，保证显示与查询一致
+            date_str = date_str or stats_manager.get_current_time_keys()[0]
             daily_stats = stats_manager.get_daily_stats(date_str)
-            date_display = date_str or datetime.now().strftime("%Y-%m-%d")
+            date_display = date_str
             
             if not daily_stats or daily_stats["total"] == 0:
                 return f"日期 {date_display} 没有统计数据"
@@ -330,45 +374,51 @@ class HiklqqbotStatsPlugin(BasePlugin):
             # 命令统计
             command_stats = daily_stats.get("commands", {})
             if command_stats:
-                sorted_commands = sorted(
-                    command_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_commands = heapq.nlargest(
+                    5,
+                    command_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
                 result += "最常用命令 (Top 5):\n"
-                for i, (cmd, count) in enumerate(sorted_commands, 1):
-                    result += f"{i}. {cmd}: {count} 次\n"
+                result += "".join(
+                    f"{i}. {cmd}: {count} 次\n"
+                    for i, (cmd, count) in enumerate(sorted_commands, 1)
+                )
                 result += "\n"
             
             # 活跃群组
             group_stats = daily_stats.get("groups", {})
             if group_stats:
-                sorted_groups = sorted(
-                    group_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_groups = heapq.nlargest(
+                    5,
+                    group_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
+                group_displays = stats_manager.get_display_ids([gid for gid, _ in sorted_groups], "groups")
                 result += "最活跃群组 (Top 5):\n"
-                for i, (group_id, count) in enumerate(sorted_groups, 1):
-                    group_display = stats_manager.get_group_display_id(group_id)
-                    result += f"{i}. 群ID: {group_display}: {count} 条消息\n"
+                result += "".join(
+                    f"{i}. 群ID: {group_displays[group_id]}: {count} 条消息\n"
+                    for i, (group_id, count) in enumerate(sorted_groups, 1)
+                )
                 result += "\n"
             
             # 活跃用户
             user_stats = daily_stats.get("users", {})
             if user_stats:
-                sorted_users = sorted(
-                    user_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_users = heapq.nlargest(
+                    5,
+                    user_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
+                user_displays = stats_manager.get_display_ids([uid for uid, _ in sorted_users], "users")
                 result += "最活跃用户 (Top 5):\n"
-                for i, (user_id, count) in enumerate(sorted_users, 1):
-                    user_display = stats_manager.get_user_display_id(user_id)
-                    result += f"{i}. 用户ID: {user_display}: {count} 条消息\n"
+                result += "".join(
+                    f"{i}. 用户ID: {user_displays[user_id]}: {count} 条消息\n"
+                    for i, (user_id, count) in enumerate(sorted_users, 1)
+                )
             
             return result
         except Exception as e:
@@ -383,8 +433,10 @@ class HiklqqbotStatsPlugin(BasePlugin):
                 if not (week_str.startswith("20") and "-W" in week_str):
                     return "周格式错误，请使用 YYYY-WNN 格式，例如: hiklqqbot_stats weekly 2023-W01"
             
+            # 统一使用统计管理器的当前时间键，保证显示与查询一致
+            week_str = week_str or stats_manager.get_current_time_keys()[1]
             weekly_stats = stats_manager.get_weekly_stats(week_str)
-            week_display = week_str or f"{datetime.now().year}-W{datetime.now().strftime('%W')}"
+            week_display = week_str
             
             if not weekly_stats or weekly_stats["total"] == 0:
                 return f"周 {week_display} 没有统计数据"
@@ -397,45 +449,51 @@ class HiklqqbotStatsPlugin(BasePlugin):
             # 命令统计
             command_stats = weekly_stats.get("commands", {})
             if command_stats:
-                sorted_commands = sorted(
-                    command_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_commands = heapq.nlargest(
+                    5,
+                    command_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
                 result += "最常用命令 (Top 5):\n"
-                for i, (cmd, count) in enumerate(sorted_commands, 1):
-                    result += f"{i}. {cmd}: {count} 次\n"
+                result += "".join(
+                    f"{i}. {cmd}: {count} 次\n"
+                    for i, (cmd, count) in enumerate(sorted_commands, 1)
+                )
                 result += "\n"
             
             # 活跃群组
             group_stats = weekly_stats.get("groups", {})
             if group_stats:
-                sorted_groups = sorted(
-                    group_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_groups = heapq.nlargest(
+                    5,
+                    group_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
+                group_displays = stats_manager.get_display_ids([gid for gid, _ in sorted_groups], "groups")
                 result += "最活跃群组 (Top 5):\n"
-                for i, (group_id, count) in enumerate(sorted_groups, 1):
-                    group_display = stats_manager.get_group_display_id(group_id)
-                    result += f"{i}. 群ID: {group_display}: {count} 条消息\n"
+                result += "".join(
+                    f"{i}. 群ID: {group_displays[group_id]}: {count} 条消息\n"
+                    for i, (group_id, count) in enumerate(sorted_groups, 1)
+                )
                 result += "\n"
             
             # 活跃用户
             user_stats = weekly_stats.get("users", {})
             if user_stats:
-                sorted_users = sorted(
-                    user_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_users = heapq.nlargest(
+                    5,
+                    user_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
+                user_displays = stats_manager.get_display_ids([uid for uid, _ in sorted_users], "users")
                 result += "最活跃用户 (Top 5):\n"
-                for i, (user_id, count) in enumerate(sorted_users, 1):
-                    user_display = stats_manager.get_user_display_id(user_id)
-                    result += f"{i}. 用户ID: {user_display}: {count} 条消息\n"
+                result += "".join(
+                    f"{i}. 用户ID: {user_displays[user_id]}: {count} 条消息\n"
+                    for i, (user_id, count) in enumerate(sorted_users, 1)
+                )
             
             return result
         except Exception as e:
@@ -453,8 +511,10 @@ class HiklqqbotStatsPlugin(BasePlugin):
                 except ValueError:
                     return "月份格式错误，请使用 YYYY-MM 格式，例如: hiklqqbot_stats monthly 2023-05"
             
+            # 统一使用统计管理器的当前时间键，保证显示与查询一致
+            month_str = month_str or stats_manager.get_current_time_keys()[2]
             monthly_stats = stats_manager.get_monthly_stats(month_str)
-            month_display = month_str or datetime.now().strftime("%Y-%m")
+            month_display = month_str
             
             if not monthly_stats or monthly_stats["total"] == 0:
                 return f"月份 {month_display} 没有统计数据"
@@ -467,45 +527,51 @@ class HiklqqbotStatsPlugin(BasePlugin):
             # 命令统计
             command_stats = monthly_stats.get("commands", {})
             if command_stats:
-                sorted_commands = sorted(
-                    command_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_commands = heapq.nlargest(
+                    5,
+                    command_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
                 result += "最常用命令 (Top 5):\n"
-                for i, (cmd, count) in enumerate(sorted_commands, 1):
-                    result += f"{i}. {cmd}: {count} 次\n"
+                result += "".join(
+                    f"{i}. {cmd}: {count} 次\n"
+                    for i, (cmd, count) in enumerate(sorted_commands, 1)
+                )
                 result += "\n"
             
             # 活跃群组
             group_stats = monthly_stats.get("groups", {})
             if group_stats:
-                sorted_groups = sorted(
-                    group_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_groups = heapq.nlargest(
+                    5,
+                    group_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
+                group_displays = stats_manager.get_display_ids([gid for gid, _ in sorted_groups], "groups")
                 result += "最活跃群组 (Top 5):\n"
-                for i, (group_id, count) in enumerate(sorted_groups, 1):
-                    group_display = stats_manager.get_group_display_id(group_id)
-                    result += f"{i}. 群ID: {group_display}: {count} 条消息\n"
+                result += "".join(
+                    f"{i}. 群ID: {group_displays[group_id]}: {count} 条消息\n"
+                    for i, (group_id, count) in enumerate(sorted_groups, 1)
+                )
                 result += "\n"
             
             # 活跃用户
             user_stats = monthly_stats.get("users", {})
             if user_stats:
-                sorted_users = sorted(
-                    user_stats.items(), 
-                    key=lambda x: x[1], 
-                    reverse=True
-                )[:5]
+                sorted_users = heapq.nlargest(
+                    5,
+                    user_stats.items(),
+                    key=lambda x: x[1]
+                )
                 
+                user_displays = stats_manager.get_display_ids([uid for uid, _ in sorted_users], "users")
                 result += "最活跃用户 (Top 5):\n"
-                for i, (user_id, count) in enumerate(sorted_users, 1):
-                    user_display = stats_manager.get_user_display_id(user_id)
-                    result += f"{i}. 用户ID: {user_display}: {count} 条消息\n"
+                result += "".join(
+                    f"{i}. 用户ID: {user_displays[user_id]}: {count} 条消息\n"
+                    for i, (user_id, count) in enumerate(sorted_users, 1)
+                )
             
             return result
         except Exception as e:
@@ -524,4 +590,7 @@ class HiklqqbotStatsPlugin(BasePlugin):
             return f"未找到展示ID: {display_id} 对应的实体"
         
         id_type_name = "用户" if id_type == "users" else "群组"
-        return f"展示ID: {display_id}\n实际ID: {real_id}\n类型: {id_type_name}" 
\ No newline at end of file
+        return f"展示ID: {display_id}\n实际ID: {real_id}\n类型: {id_type_name}"
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotStatsPlugin
@@ -1,18 +1,33 @@
 from plugins.base_plugin import BasePlugin
 import logging
 from auth_manager import auth_manager
-import base64
-import uuid
+from itertools import islice
+import secrets
 import json
 import os
 import time
+import asyncio
+import threading
 from typing import Dict, Any
 
+# 优先使用 orjson 解析/序列化记录，未安装时回退到标准库 json
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
 class HiklqqbotUseridPlugin(BasePlugin):
     """
     用户ID查询插件，生成唯一标识符并记录用户信息
     """
     
+    __slots__ = ("_io_lock", "_log_lines", "compact_threshold", "data_dir", "log_file", "records_file", "user_records")
+    
     def __init__(self):
         super().__init__(
             command="hiklqqbot_userid", 
@@ -26,36 +41,78 @@ class HiklqqbotUseridPlugin(BasePlugin):
         self.data_dir = "data/user_records"
         os.makedirs(self.data_dir, exist_ok=True)
         
-        # 用户记录文件路径
+        # 用户记录文件路径：快照文件 + 追加日志
         self.records_file = os.path.join(self.data_dir, "user_records.json")
+        self.log_file = os.path.join(self.data_dir, "user_records.jsonl")
+        # 追加日志超过该行数时合并为快照
+        self.compact_threshold = 1000
+        self._log_lines = 0
+        # 记录写入在线程池中执行，用锁保证追加与合并互斥
+        self._io_lock = threading.Lock()
         
         # 加载现有记录
         self.user_records = self._load_records()
-        
+    
     def _load_records(self) -> Dict[str, Any]:
-        """加载用户记录"""
+        """加载用户记录（快照 + 回放追加日志）"""
+        records = {}
         if os.path.exists(self.records_file):
             try:
-                with open(self.records_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.records_file, 'rb') as f:
+                    records = _loads(f.read())
             except Exception as e:
                 self.logger.error(f"加载用户记录失败: {str(e)}")
-        return {}
+        
+        if os.path.exists(self.log_file):
+            try:
+                with open(self.log_file, 'rb') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        record = _loads(line)
+                        records[record["unique_id"]] = record
+                        self._log_lines += 1
+            except Exception as e:
+                self.logger.error(f"回放用户记录日志失败: {str(e)}")
+        return records
         
     def _save_records(self) -> bool:
-        """保存用户记录"""
-        try:
-            with open(self.records_file, 'w', encoding='utf-8') as f:
-                json.dump(self.user_records, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            self.logger.error(f"保存用户记录失败: {str(e)}")
-            return False
+        """将全部用户记录写入快照，并清空追加日志"""
+        with self._io_lock:
+            try:
+                with open(self.records_file, 'wb') as f:
+                    f.write(_dumps(dict(self.user_records)))
+                with open(self.log_file, 'wb'):
+                    pass
+                self._log_lines = 0
+                return True
+            except Exception as e:
+                self.logger.error(f"保存用户记录失败: {str(e)}")
+                return False
+    
+    def _append_record(self, record: Dict[str, Any]) -> bool:
+        """将单条记录追加到日志，日志过长时合并为快照"""
+        with self._io_lock:
+            try:
+                with open(self.log_file, 'ab') as f:
+                    f.write(_dumps(record) + b"\n")
+                self._log_lines += 1
+            except Exception as e:
+                self.logger.error(f"追加用户记录失败: {str(e)}")
+                return False
+        
+        if self._log_lines >= self.compact_threshold:
+            return self._save_records()
+        return True
             
     def _generate_unique_id(self) -> str:
         """生成唯一标识符"""
-        # 生成UUID并取前12位作为标识符
-        return str(uuid.uuid4())[:12]
+        # 生成12位十六进制随机标识符，极小概率重复时重新生成
+        while True:
+            unique_id = secrets.token_hex(6)
+            if unique_id not in self.user_records:
+                return unique_id
     
     async def handle(self, params: str, user_id: str = None, group_openid: str = None, **kwargs) -> str:
         """
@@ -99,12 +156,8 @@ class HiklqqbotUseridPlugin(BasePlugin):
                 
         # 管理员列出最近记录
         elif params == "list" and auth_manager.is_admin(user_id):
-            # 获取最近的10条记录
-            recent_records = sorted(
-                self.user_records.values(), 
-                key=lambda x: x.get('timestamp', 0), 
-                reverse=True
-            )[:10]
+            # 获取最近的10条记录：记录按生成时间顺序插入，直接取末尾即可
+            recent_records = list(islice(reversed(self.user_records.values()), 10))
             
             if not recent_records:
                 return "没有找到任何记录"
@@ -146,7 +199,7 @@ class HiklqqbotUseridPlugin(BasePlugin):
         self.user_records[unique_id] = record
         
         # 保存记录
-        if self._save_records():
+        if await asyncio.to_thread(self._append_record, record):
             self.logger.info(f"已记录用户 {user_id} 的信息，唯一标识符: {unique_id}")
         else:
             self.logger.warning(f"记录用户 {user_id} 的信息失败")
@@ -155,4 +208,7 @@ class HiklqqbotUseridPlugin(BasePlugin):
         response = f"您的唯一标识符是: {unique_id}"
         response += "\n该标识符已与您的账号关联，请妥善保管"
         
-        return response 
\ No newline at end of file
+        return response
+
+# 供插件管理器直接获取插件类
+__plugin__ = HiklqqbotUseridPlugin
@@ -3,8 +3,9 @@ import importlib
 import pkgutil
 import inspect
 import os
+from bisect import bisect_left
 import sys
-from typing import Dict, List, Type, Optional
+from typing import Dict, List, Type, Optional, Tuple
 
 from .base_plugin import BasePlugin
 from auth_manager import auth_manager
@@ -14,12 +15,26 @@ logger = logging.getLogger("plugin_manager")
 # 从环境变量中读取是否启用命令前缀规范
 ENFORCE_COMMAND_PREFIX = os.environ.get("ENFORCE_COMMAND_PREFIX", "true").lower() == "true"
 
+# 插件目录中不作为插件加载的模块
+EXCLUDED_PLUGIN_MODULES = frozenset({"__init__", "base_plugin", "plugin_manager"})
+
+# 从环境变量中读取禁用的插件模块（逗号分隔的模块名），被禁用的模块不会被导入
+DISABLED_PLUGINS = frozenset(
+    name.strip() for name in os.environ.get("DISABLED_PLUGINS", "").split(",") if name.strip()
+)
+
 class PluginManager:
     """
     插件管理器，负责加载和管理所有插件
     """
     
     def __init__(self):
+        # 按内置/自定义划分的插件列表，插件字典变化时失效
+        self._partitions: Optional[Tuple[List[BasePlugin], List[BasePlugin]]] = None
+        # 排序后的命令列表，用于前缀查找
+        self._sorted_commands: Optional[List[str]] = None
+        # 帮助文本缓存，键为show_hidden
+        self._help_cache: Dict[bool, str] = {}
         self.plugins: Dict[str, BasePlugin] = {}
         self.logger = logger
         
@@ -37,7 +52,11 @@ class PluginManager:
             
             # 遍历包中的所有模块
             for _, module_name, is_pkg in pkgutil.iter_modules(plugin_package.__path__):
-                if is_pkg or module_name in ["base_plugin", "plugin_manager"]:
+                if is_pkg or module_name in EXCLUDED_PLUGIN_MODULES:
+                    continue
+                
+                if module_name in DISABLED_PLUGINS:
+                    self.logger.info(f"插件模块 {module_name} 已被禁用，跳过导入")
                     continue
                 
                 try:
@@ -52,15 +71,11 @@ class PluginManager:
                     
                     # 查找模块中的插件类
                     found_plugin = False
-                    for _, obj in inspect.getmembers(module, inspect.isclass):
-                        if (issubclass(obj, BasePlugin) and 
-                            obj is not BasePlugin and 
-                            obj.__module__ == module_path):
-                            
-                            # 实例化插件并注册
-                            plugin = obj()
-                            self.register_plugin(plugin)
-                            found_plugin = True
+                    for obj in self._find_plugin_classes(module):
+                        # 实例化插件并注册
+                        plugin = obj()
+                        self.register_plugin(plugin)
+                        found_plugin = True
                             
                     if not found_plugin:
                         self.logger.info(f"模块 {module_name} 中未找到插件类")
@@ -68,54 +83,30 @@ class PluginManager:
                 except Exception as e:
                     self.logger.error(f"加载插件模块 {module_name} 失败: {str(e)}")
             
-            # 加载完成后清理重复命令
-            self._clean_duplicate_commands()
-            
             self.logger.info(f"插件加载完成，共加载 {len(self.plugins)} 个插件")
             
         except Exception as e:
             self.logger.error(f"加载插件包 {plugin_package_name} 失败: {str(e)}")
         
-    def _clean_duplicate_commands(self):
+    @staticmethod
+    def _find_plugin_classes(module) -> List[Type[BasePlugin]]:
         """
-        清理重复的命令和不规范的命令格式
-        根据配置决定是否确保所有命令都以/开头，并处理重复命令
+        获取模块中的插件类
+        优先使用模块声明的 __plugin__ 属性（单个类或类的元组），未声明时回退到扫描模块中定义的类
         """
-        self.logger.info("开始清理重复和非标准命令...")
-        
-        # 收集所有插件标准化后的命令
-        cleaned_plugins = {}
-        duplicate_count = 0
-        
-        for cmd, plugin in list(self.plugins.items()):
-            # 根据配置决定是否确保命令以/开头
-            if ENFORCE_COMMAND_PREFIX and not cmd.startswith('/'):
-                new_cmd = f'/{cmd}'
-                self.logger.warning(f"命令 {cmd} 不符合规范，已更正为 {new_cmd}")
-                plugin.command = new_cmd  # 更新插件内部命令属性
-                
-                # 如果新命令已存在，记录冲突
-                if new_cmd in cleaned_plugins:
-                    self.logger.warning(f"命令冲突: {cmd} 和 {new_cmd} 指向不同插件")
-                    duplicate_count += 1
-                    continue  # 跳过这个冲突的命令
-                    
-                # 添加标准化的命令
-                cleaned_plugins[new_cmd] = plugin
-                
-                # 删除原始非标准命令
-                if cmd in self.plugins:
-                    del self.plugins[cmd]
-            else:
-                # 命令已符合规范或不强制规范，直接添加
-                cleaned_plugins[cmd] = plugin
-        
-        # 更新插件列表
-        self.plugins.clear()
-        for cmd, plugin in cleaned_plugins.items():
-            self.plugins[cmd] = plugin
-            
-        self.logger.info(f"命令清理完成。标准化 {len(cleaned_plugins)} 个命令，移除 {duplicate_count} 个重复命令。")
+        plugin_classes = getattr(module, "__plugin__", None)
+        if plugin_classes is None:
+            plugin_classes = [
+                obj for _, obj in inspect.getmembers(module, inspect.isclass)
+                if obj.__module__ == module.__name__
+            ]
+        elif not isinstance(plugin_classes, (list, tuple)):
+            plugin_classes = (plugin_classes,)
+        
+        return [
+            obj for obj in plugin_classes
+            if issubclass(obj, BasePlugin) and obj is not BasePlugin
+        ]
         
     def register_plugin(self, plugin: BasePlugin) -> None:
         """
@@ -126,8 +117,8 @@ class PluginManager:
         """
         # 根据配置决定是否标准化命令名称（确保以/开头）
         command = plugin.command
-        if ENFORCE_COMMAND_PREFIX and not command.startswith('/'):
-            command = f'/{command}'
+        if ENFORCE_COMMAND_PREFIX and command[:1] != '/':
+            command = '/' + command
             # 更新插件内部的命令属性
             plugin.command = command
         
@@ -139,59 +130,83 @@ class PluginManager:
         if ENFORCE_COMMAND_PREFIX and plain_command in self.plugins:
             self.logger.warning(f"发现不带前缀的插件命令 {plain_command}，将被替换为 {command}")
             del self.plugins[plain_command]
+            self.invalidate_caches()
+        
+        # 同一插件实例重复注册时直接跳过
+        existing = self.plugins.get(command)
+        if existing is plugin:
+            return
         
         # 如果命令已存在，记录警告
-        if command in self.plugins:
+        if existing is not None:
             self.logger.warning(f"插件命令 {command} 已存在，将被覆盖")
         
         # 注册标准化后的命令
         self.plugins[command] = plugin
+        self.invalidate_caches()
         self.logger.info(f"注册插件: {plugin.__class__.__name__}, 命令: {command}, 类型: {'内置' if plugin.is_builtin else '自定义'}")
         
     def register_plugins_from_directory(self, directory: str = "plugins") -> None:
         """
-        从指定目录加载所有插件
+        从指定目录加载所有插件（已弃用，请使用 load_plugins）
         
         Args:
             directory: 插件目录路径
         """
-        self.logger.info(f"从目录'{directory}'加载插件...")
+        self.logger.warning("register_plugins_from_directory 已弃用，请使用 load_plugins")
         
         # 确保目录存在
         if not os.path.exists(directory):
             self.logger.error(f"插件目录'{directory}'不存在")
             return
-            
-        # 获取所有插件文件
-        plugin_files = [
-            f[:-3] for f in os.listdir(directory) 
-            if f.endswith(".py") and f != "__init__.py" and f != "base_plugin.py" and f != "plugin_manager.py"
-        ]
         
-        # 导入所有插件模块
-        for plugin_file in plugin_files:
-            try:
-                # 构建模块名
-                module_name = f"{directory}.{plugin_file}"
-                if directory.startswith("."):
-                    module_name = module_name[1:]
-                
-                # 导入模块
-                module = importlib.import_module(module_name)
-                
-                # 查找模块中所有BasePlugin的子类
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and 
-                        issubclass(obj, BasePlugin) and 
-                        obj != BasePlugin):
-                        
-                        # 实例化并注册插件
-                        plugin = obj()
-                        self.register_plugin(plugin)
-                        
-            except Exception as e:
-                self.logger.error(f"加载插件'{plugin_file}'失败: {e}")
-                
+        self.load_plugins(os.path.normpath(directory).replace(os.sep, "."))
+    
+    def invalidate_caches(self) -> None:
+        """
+        清除插件列表、命令排序和帮助文本等派生缓存
+        直接修改 plugins 字典或运行时修改插件的 hidden 属性后需要调用
+        """
+        self._partitions = None
+        self._sorted_commands = None
+        self._help_cache.clear()
+    
+    def _get_partitions(self) -> Tuple[List[BasePlugin], List[BasePlugin]]:
+        """获取按内置/自定义划分的插件列表"""
+        if self._partitions is None:
+            builtin_plugins = []
+            custom_plugins = []
+            for plugin in self.plugins.values():
+                (builtin_plugins if plugin.is_builtin else custom_plugins).append(plugin)
+            self._partitions = (builtin_plugins, custom_plugins)
+        return self._partitions
+    
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        获取以指定前缀开头的可见命令，用于未知命令时的提示
+        
+        Args:
+            prefix: 命令前缀
+            limit: 最多返回的命令数量
+            
+        Returns:
+            匹配的命令列表
+        """
+        if self._sorted_commands is None:
+            self._sorted_commands = sorted(self.plugins)
+        
+        commands = self._sorted_commands
+        result = []
+        for i in range(bisect_left(commands, prefix), len(commands)):
+            command = commands[i]
+            if not command.startswith(prefix):
+                break
+            if not self.plugins[command].hidden:
+                result.append(command)
+                if len(result) >= limit:
+                    break
+        return result
+    
     def get_plugin(self, command: str) -> Optional[BasePlugin]:
         """
         获取指定命令对应的插件
@@ -220,7 +235,7 @@ class PluginManager:
         Returns:
             所有内置插件实例的列表
         """
-        return [plugin for plugin in self.plugins.values() if plugin.is_builtin]
+        return list(self._get_partitions()[0])
         
     def get_custom_plugins(self) -> List[BasePlugin]:
         """
@@ -229,7 +244,7 @@ class PluginManager:
         Returns:
             所有自定义插件实例的列表
         """
-        return [plugin for plugin in self.plugins.values() if not plugin.is_builtin]
+        return list(self._get_partitions()[1])
         
     def get_help(self, show_hidden: bool = False) -> str:
         """
@@ -244,35 +259,47 @@ class PluginManager:
         if not self.plugins:
             return "没有可用的命令"
         
-        # 分类插件
-        builtin_plugins = []
-        custom_plugins = []
+        cached = self._help_cache.get(show_hidden)
+        if cached is not None:
+            return cached
         
-        for command, plugin in self.plugins.items():
-            # 跳过隐藏插件
-            if hasattr(plugin, 'hidden') and plugin.hidden and not show_hidden:
-                continue
-                
-            if hasattr(plugin, 'is_builtin') and plugin.is_builtin:
-                builtin_plugins.append(plugin)
-            else:
-                custom_plugins.append(plugin)
+        # 分类插件
+        builtin_plugins, custom_plugins = self._get_partitions()
+        if not show_hidden:
+            builtin_plugins = [plugin for plugin in builtin_plugins if not plugin.hidden]
+            custom_plugins = [plugin for plugin in custom_plugins if not plugin.hidden]
         
         # 构建帮助文本
-        help_text = "可用命令列表:\n"
+        parts = ["可用命令列表:\n"]
         
         if builtin_plugins:
-            help_text += "\n系统命令:\n"
-            for plugin in builtin_plugins:
-                help_text += f"- {plugin.help()}\n"
+            parts.append("\n系统命令:\n")
+            parts.extend(f"- {plugin.help()}\n" for plugin in builtin_plugins)
                 
         if custom_plugins:
-            help_text += "\n自定义命令:\n"
-            for plugin in custom_plugins:
-                help_text += f"- {plugin.help()}\n"
+            parts.append("\n自定义命令:\n")
+            parts.extend(f"- {plugin.help()}\n" for plugin in custom_plugins)
         
+        help_text = "".join(parts)
+        self._help_cache[show_hidden] = help_text
         return help_text
     
+    def unknown_command_message(self, command: str) -> str:
+        """
+        生成未知命令的提示信息，存在前缀匹配的命令时一并给出
+        
+        Args:
+            command: 未找到的命令
+            
+        Returns:
+            提示信息文本
+        """
+        message = f"未找到命令: {command}\n"
+        suggestions = self.suggest(command) if command.strip('/') else []
+        if suggestions:
+            message += f"你是否想使用: {', '.join(suggestions)}\n"
+        return message + "你可以通过 /help 获取可用命令列表"
+    
     async def handle_command(self, command: str, params: str = "", user_id: str = None, **kwargs) -> str:
         """
         处理命令
@@ -286,16 +313,17 @@ class PluginManager:
         Returns:
             处理结果
         """
-        self.logger.info(f"处理命令: {command}, 参数: {params}, 用户ID: {user_id}, 额外参数: {kwargs}")
+        self.logger.info("处理命令: %s, 参数: %s, 用户ID: %s", command, params, user_id)
+        self.logger.debug("命令 %s 的额外参数: %s", command, kwargs)
         
         # 检查维护模式
-        if auth_manager.is_maintenance_mode() and not auth_manager.is_admin(user_id):
+        if auth_manager.maintenance_mode and user_id not in auth_manager.admins:
             return "机器人当前处于维护模式，仅管理员可用"
         
         # 根据配置处理命令前缀
         # 如果强制规范化打开，但命令不以/开头，自动添加/
-        if ENFORCE_COMMAND_PREFIX and not command.startswith('/'):
-            command = f'/{command}'
+        if ENFORCE_COMMAND_PREFIX and command[:1] != '/':
+            command = '/' + command
         
         plugin = self.get_plugin(command)
         if not plugin:
@@ -306,7 +334,7 @@ class PluginManager:
             
             # 命令不存在，返回提示信息
             if not plugin:
-                return f"未找到命令: {command}\n你可以通过 /help 获取可用命令列表"
+                return self.unknown_command_message(command)
         
         try:
             # 将额外参数传递给插件的handle方法
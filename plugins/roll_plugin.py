@@ -9,6 +9,8 @@ ROLL_PATTERN = re.compile(r"^(\d*)d(\d+)([+-]\d+)?$")
 
 
 class RollPlugin(BasePlugin):
+    __slots__ = ("default_count", "default_sides", "max_count", "max_modifier", "max_sides")
+
     def __init__(self):
         super().__init__(
             command="roll",
@@ -77,3 +79,6 @@ class RollPlugin(BasePlugin):
             detail = base_text
 
         return f"🎲 {expression} = {detail} = {total}"
+
+# 供插件管理器直接获取插件类
+__plugin__ = RollPlugin
@@ -6,6 +6,8 @@ class SimpleResponsePlugin(BasePlugin):
     简单的响应插件，输入1返回2
     """
     
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__(command="1", description="输入/1返回2", is_builtin=False)
         self.logger = logging.getLogger("plugin.simple_response")
@@ -24,4 +26,7 @@ class SimpleResponsePlugin(BasePlugin):
             响应结果
         """
         self.logger.info("收到1命令，返回2")
-        return "2" 
\ No newline at end of file
+        return "2"
+
+# 供插件管理器直接获取插件类
+__plugin__ = SimpleResponsePlugin
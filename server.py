@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 import json
 import hmac
@@ -10,12 +10,30 @@ from config import BOT_TOKEN, SERVER_HOST, SERVER_PORT
 from event_handler import event_handler
 import nacl.signing  # 替换ed25519
 
+# 优先使用 orjson 解析事件，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("server")
 
 app = FastAPI()
 
+# 固定内容的响应体，启动时序列化一次
+_SUCCESS_BODY = b'{"success":true}'
+_NO_EVENT_TYPE_BODY = b'{"success":false,"error":"No event type"}'
+
+# 请求签名的HMAC密钥只依赖 BOT_TOKEN，预先完成密钥初始化，每次请求复制使用
+_HMAC_PROTOTYPE = hmac.new(BOT_TOKEN.encode(), None, hashlib.sha256) if BOT_TOKEN else None
+
+# OP 13 签名密钥只依赖 BOT_TOKEN，启动时计算一次：将 BOT_TOKEN 重复扩展到 ED25519 种子长度
+_SIGNING_SEED = (BOT_TOKEN * (32 // len(BOT_TOKEN) + 1))[:32] if BOT_TOKEN else ""
+_SIGNING_KEY = nacl.signing.SigningKey(_SIGNING_SEED.encode()) if BOT_TOKEN else None
+
 async def verify_signature(request: Request):
     """验证请求签名"""
     if not BOT_TOKEN:
@@ -30,13 +48,11 @@ async def verify_signature(request: Request):
     
     # 读取请求体
     body = await request.body()
-    raw_body = body.decode()
     
-    # 构造签名内容
-    message = timestamp + raw_body
-    
-    # 计算签名
-    h = hmac.new(BOT_TOKEN.encode(), message.encode(), hashlib.sha256)
+    # 计算签名，签名内容为时间戳 + 请求体，直接在字节上计算
+    h = _HMAC_PROTOTYPE.copy()
+    h.update(timestamp.encode())
+    h.update(body)
     signature = base64.b64encode(h.digest()).decode()
     
     # 验证签名
@@ -44,15 +60,14 @@ async def verify_signature(request: Request):
         logger.warning(f"签名验证失败! 收到: {qq_signature}, 计算: {signature}")
         raise HTTPException(status_code=401, detail="Invalid signature")
     
-    return raw_body
+    return body
 
 @app.post("/")
-async def bot_event_handler(raw_body: str = Depends(verify_signature)):
+async def bot_event_handler(body: bytes = Depends(verify_signature)):
     """处理QQ机器人事件"""
     try:
         # 解析事件数据
-        event_data = json.loads(raw_body)
-        logger.info(f"收到事件: {event_data}")
+        event_data = _json_loads(body)
         
         # 处理鉴权挑战
         if "challenge" in event_data:
@@ -69,15 +84,8 @@ async def bot_event_handler(raw_body: str = Depends(verify_signature)):
             # 构造消息
             msg = event_ts + plain_token
             
-            # 使用BOT_TOKEN扩展到ED25519密钥长度
-            seed = BOT_TOKEN
-            while len(seed) < 32:
-                seed = seed + seed
-            seed = seed[:32]
-            
-            # 使用PyNaCl库计算签名
-            signing_key = nacl.signing.SigningKey(seed.encode())
-            signed = signing_key.sign(msg.encode())
+            # 使用预先生成的PyNaCl签名密钥计算签名
+            signed = _SIGNING_KEY.sign(msg.encode())
             signature = signed.signature.hex()
             
             # 返回签名结果
@@ -86,23 +94,25 @@ async def bot_event_handler(raw_body: str = Depends(verify_signature)):
                 "signature": signature
             })
         
+        logger.debug("收到事件: %s", event_data)
+        
         # 获取事件类型和数据
         event_type = event_data.get("t")
         event_info = event_data.get("d", {})
         
         if not event_type:
             logger.warning(f"未找到事件类型: {event_data}")
-            return JSONResponse(content={"success": False, "error": "No event type"})
+            return Response(content=_NO_EVENT_TYPE_BODY, media_type="application/json")
         
         # 处理事件
         logger.info(f"处理事件: {event_type}")
         try:
             result = await event_handler.handle_event(event_type, event_info)
-            logger.info(f"事件 {event_type} 处理结果: {result}")
+            logger.info("事件 %s 处理结果: %s", event_type, result)
         except Exception as e:
             logger.error(f"处理事件 {event_type} 异常: {str(e)}")
         
-        return JSONResponse(content={"success": True})
+        return Response(content=_SUCCESS_BODY, media_type="application/json")
     except Exception as e:
         logger.error(f"事件处理异常: {e}", exc_info=True)
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -1,30 +1,68 @@
 import json
 import logging
 import os
+import sys
+import asyncio
+import atexit
+import queue
+import tempfile
+import threading
+import heapq
 import time
 import random
-import string
-from typing import Dict, List, Set, Optional, Tuple
-from datetime import datetime
-from config import STATS_MAX_MONTHS
+from collections import Counter
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Set, Optional, Tuple
+from datetime import datetime, timedelta
+from config import STATS_MAX_DAYS, STATS_MAX_WEEKS, STATS_MAX_MONTHS, STATS_FLUSH_INTERVAL
+
+# 支持的ID类型
+ID_TYPES = frozenset({"users", "groups"})
+
+# 持久化的数据部分，与实例属性名一致
+DATA_PARTS = ("groups", "users", "usage_stats", "id_mappings", "time_stats")
+
+# 各时间段统计保留的键数
+TIME_STATS_RETENTION = {"daily": STATS_MAX_DAYS, "weekly": STATS_MAX_WEEKS, "monthly": STATS_MAX_MONTHS}
+
+# 未写入的修改次数达到该值时立即写入
+FLUSH_MAX_PENDING = 1000
+
+# 延迟加载的属性：数据部分及由其派生的索引和计数
+LAZY_ATTRS = frozenset(DATA_PARTS + ("_display_index", "_total_commands"))
+
+# 后台写入队列容量，队列满时flush会等待写入线程
+WRITE_QUEUE_SIZE = 128
+
+def _json_default(obj):
+    """JSON序列化补充：集合直接转为列表保存"""
+    if isinstance(obj, set):
+        return list(obj)
+    raise TypeError(f"无法序列化类型: {type(obj).__name__}")
+
+# 优先使用 orjson 序列化/解析数据文件，未安装时回退到标准库 json
+try:
+    import orjson
+    _loads = orjson.loads
+    
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_json_default)
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
 
 class StatsManager:
     """
     统计管理器：记录和管理机器人的统计数据
     包括群组、用户、消息等信息
-    """
-    _instance = None
     
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super(StatsManager, cls).__new__(cls)
-            cls._instance.initialized = False
-        return cls._instance
+    请使用模块末尾的全局实例stats_manager，不要另行创建
+    """
     
     def __init__(self, data_dir: str = "data"):
-        if self.initialized:
-            return
-            
         self.logger = logging.getLogger("stats_manager")
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
@@ -34,14 +72,51 @@ class StatsManager:
         self.stats_file = os.path.join(data_dir, "usage_stats.json")
         self.id_mappings_file = os.path.join(data_dir, "id_mappings.json")
         self.time_stats_file = os.path.join(data_dir, "time_stats.json")
+        self._data_files = {
+            "groups": self.groups_file,
+            "users": self.users_file,
+            "usage_stats": self.stats_file,
+            "id_mappings": self.id_mappings_file,
+            "time_stats": self.time_stats_file
+        }
         
+        # 延迟写入状态：待写入的数据部分、未写入的修改次数、已安排的写入任务及其所属事件循环
+        self._dirty: Set[str] = set()
+        self._pending_changes = 0
+        self._flush_handle = None
+        self._flush_loop = None
+        # 后台写入线程：flush只负责序列化，文件写入在该线程中完成
+        self._write_q: "queue.Queue[Tuple[str, bytes]]" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        threading.Thread(target=self._writer_loop, name="stats-writer", daemon=True).start()
+        
+        # 最活跃排行缓存 {(kind, limit): [(id, count), ...]}，计数更新时增量维护
+        self._top_cache: Dict[Tuple[str, int], List[tuple]] = {}
+        # 当前日/周/月键名缓存，过了午夜才重新计算
+        self._time_keys: Tuple[str, str, str] = ("", "", "")
+        self._time_keys_expires = 0.0
+        
+        # 统计数据（DATA_PARTS及其派生索引）在首次访问时才从文件加载，见__getattr__
+        self._loaded = False
+        
+        # 退出时写入尚未保存的数据，并等待写入线程完成
+        atexit.register(self.close)
+    
+    def __getattr__(self, name):
+        """首次访问统计数据时才加载数据文件，之后这些属性直接命中实例字典"""
+        if name in LAZY_ATTRS and not self.__dict__.get("_loaded", True):
+            self._load_all()
+            return getattr(self, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+    
+    def _load_all(self):
+        """初始化数据结构并从文件加载统计数据，只执行一次"""
         # 数据结构
-        self.groups = {}  # {group_id: {"join_time": time, "members": [user_ids], ...}}
-        self.users = {}   # {user_id: {"first_seen": time, ...}}
+        self.groups = {}  # {group_id: {"join_time": time, "members": {user_ids}, ...}}
+        self.users = {}   # {user_id: {"first_seen": time, "groups": {group_ids}, ...}}
         self.usage_stats = {
-            "commands": {},  # {command_name: count}
-            "groups": {},    # {group_id: message_count}
-            "users": {},     # {user_id: message_count}
+            "commands": Counter(),  # {command_name: count}
+            "groups": Counter(),    # {group_id: message_count}
+            "users": Counter(),     # {user_id: message_count}
             "total_messages": 0
         }
         
@@ -50,6 +125,10 @@ class StatsManager:
             "users": {},  # {real_id: display_id}
             "groups": {}  # {real_id: display_id}
         }
+        # 展示ID反向索引 {display_id: (real_id, id_type)}
+        self._display_index: Dict[str, Tuple[str, str]] = {}
+        # 命令总数计数器，随log_command递增，避免每次查询都对commands求和
+        self._total_commands = 0
         
         # 时间段统计结构 - 新增
         self.time_stats = {
@@ -59,116 +138,231 @@ class StatsManager:
         }
         
         # 加载数据
+        self._loaded = True
         self._load_data()
+        self._prepare_loaded_data()
+        self._rebuild_display_index()
+        self._total_commands = sum(self.usage_stats.get("commands", {}).values())
         
-        # 初始化后清理过期的时间统计数据
+        # 加载后清理过期的时间统计数据
         self.cleanup_time_stats()
-        
-        self.initialized = True
-        
+    
     def _load_data(self):
         """从文件加载数据"""
         try:
-            if os.path.exists(self.groups_file):
-                with open(self.groups_file, "r", encoding="utf-8") as f:
-                    self.groups = json.load(f)
-            
-            if os.path.exists(self.users_file):
-                with open(self.users_file, "r", encoding="utf-8") as f:
-                    self.users = json.load(f)
-                    
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, "r", encoding="utf-8") as f:
-                    self.usage_stats = json.load(f)
-            
-            # 加载ID映射 - 新增
-            if os.path.exists(self.id_mappings_file):
-                with open(self.id_mappings_file, "r", encoding="utf-8") as f:
-                    self.id_mappings = json.load(f)
-            
-            # 加载时间段统计 - 新增
-            if os.path.exists(self.time_stats_file):
-                with open(self.time_stats_file, "r", encoding="utf-8") as f:
-                    self.time_stats = json.load(f)
+            for part, path in self._data_files.items():
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        setattr(self, part, _loads(f.read()))
         except Exception as e:
             self.logger.error(f"加载统计数据失败: {e}")
     
+    def _prepare_loaded_data(self):
+        """
+        整理加载的数据：
+        - 群成员和用户所在群组列表转换为集合，文件中仍以列表保存
+        - 驻留群组/用户ID字符串，使各处引用共享同一对象
+        - 计数字典转换为Counter
+        """
+        intern = sys.intern
+        self.groups = {intern(gid): group for gid, group in self.groups.items()}
+        self.users = {intern(uid): user for uid, user in self.users.items()}
+        for group in self.groups.values():
+            group["members"] = {intern(uid) for uid in group.get("members", [])}
+        for user in self.users.values():
+            user["groups"] = {intern(gid) for gid in user.get("groups", [])}
+        
+        for id_type in ID_TYPES:
+            self.id_mappings[id_type] = {
+                intern(real_id): display_id
+                for real_id, display_id in self.id_mappings.get(id_type, {}).items()
+            }
+        
+        buckets = [self.usage_stats]
+        for period_stats in self.time_stats.values():
+            buckets.extend(period_stats.values())
+        for bucket in buckets:
+            bucket["commands"] = Counter(bucket.get("commands", {}))
+            for kind in ID_TYPES:
+                bucket[kind] = Counter({intern(entity_id): count for entity_id, count in bucket.get(kind, {}).items()})
+    
     def cleanup_time_stats(self):
-        """清理过期的时间统计数据，只保留最近STATS_MAX_MONTHS个月的数据"""
+        """清理过期的时间统计数据，日/周/月统计分别只保留最近STATS_MAX_DAYS/STATS_MAX_WEEKS/STATS_MAX_MONTHS个时间段"""
         try:
-            if not self.time_stats["monthly"]:
-                return  # 如果没有月统计数据，直接返回
-                
-            # 获取所有月份并按时间排序（格式为YYYY-MM）
-            all_months = sorted(list(self.time_stats["monthly"].keys()))
+            removed = {}
+            for time_type, max_keys in TIME_STATS_RETENTION.items():
+                period_stats = self.time_stats[time_type]
+                if len(period_stats) <= max_keys:
+                    continue
+                # 键名格式（YYYY-MM-DD、YYYY-WNN、YYYY-MM）按字符串排序即按时间排序
+                expired = sorted(period_stats)[:-max_keys]
+                for key in expired:
+                    del period_stats[key]
+                removed[time_type] = expired
             
-            # 如果月统计数据超过最大保留数量，则删除最早的数据
-            if len(all_months) > STATS_MAX_MONTHS:
-                months_to_remove = all_months[:-STATS_MAX_MONTHS]
-                for month in months_to_remove:
-                    del self.time_stats["monthly"][month]
-                self.logger.info(f"已清理过期月统计数据：{months_to_remove}")
+            if removed:
+                self.logger.info(f"已清理过期时间统计数据：{removed}")
                 # 保存更新后的数据
-                self._save_data()
+                self._save_data("time_stats")
         except Exception as e:
             self.logger.error(f"清理时间统计数据失败: {e}")
     
-    def _save_data(self):
-        """保存数据到文件"""
+    def _save_data(self, *parts: str):
+        """
+        标记数据已修改，并安排合并写入
+        
+        在事件循环中调用时，修改会在STATS_FLUSH_INTERVAL秒后统一写入；
+        没有运行中的事件循环或未写入的修改过多时立即写入
+        
+        Args:
+            parts: 被修改的数据部分（见DATA_PARTS），为空时表示全部
+        """
+        self._dirty.update(parts or DATA_PARTS)
+        self._pending_changes += 1
+        
+        if self._pending_changes >= FLUSH_MAX_PENDING:
+            self.flush()
+            return
+        
         try:
-            with open(self.groups_file, "w", encoding="utf-8") as f:
-                json.dump(self.groups, f, ensure_ascii=False, indent=2)
-            
-            with open(self.users_file, "w", encoding="utf-8") as f:
-                json.dump(self.users, f, ensure_ascii=False, indent=2)
-                
-            with open(self.stats_file, "w", encoding="utf-8") as f:
-                json.dump(self.usage_stats, f, ensure_ascii=False, indent=2)
-            
-            # 保存ID映射 - 新增
-            with open(self.id_mappings_file, "w", encoding="utf-8") as f:
-                json.dump(self.id_mappings, f, ensure_ascii=False, indent=2)
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        handle = self._flush_handle
+        if handle is not None:
+            # 已安排的写入属于当前事件循环且未取消时直接复用；
+            # 安排写入的事件循环已停止时，该定时器不会再触发，需要丢弃后重新安排
+            if loop is self._flush_loop and not handle.cancelled():
+                return
+            handle.cancel()
+            self._flush_handle = None
+            self._flush_loop = None
+        
+        if loop is None:
+            self.flush()
+            return
+        self._flush_loop = loop
+        self._flush_handle = loop.call_later(STATS_FLUSH_INTERVAL, self.flush)
+    
+    def flush(self):
+        """立即序列化已修改的数据，交给后台写入线程写入文件"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+            self._flush_loop = None
+        
+        dirty, self._dirty = self._dirty, set()
+        self._pending_changes = 0
+        for part in DATA_PARTS:
+            if part not in dirty:
+                continue
+            try:
+                # 先完整序列化再一次写入，使用紧凑格式
+                self._write_q.put((self._data_files[part], _dumps(getattr(self, part))))
+            except Exception as e:
+                self.logger.error(f"保存统计数据失败 ({part}): {e}")
+    
+    def close(self):
+        """写入所有尚未保存的数据并等待写入线程完成"""
+        self.flush()
+        self._write_q.join()
+    
+    def _writer_loop(self):
+        """后台写入线程：取出队列中积压的全部写入，同一文件只写最新的内容"""
+        while True:
+            items = [self._write_q.get()]
+            while True:
+                try:
+                    items.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
             
-            # 保存时间段统计 - 新增
-            with open(self.time_stats_file, "w", encoding="utf-8") as f:
-                json.dump(self.time_stats, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            self.logger.error(f"保存统计数据失败: {e}")
+            latest = dict(items)
+            for path, payload in latest.items():
+                try:
+                    self._write_atomic(path, payload)
+                except Exception as e:
+                    self.logger.error(f"写入统计数据文件失败 ({path}): {e}")
+            for _ in items:
+                self._write_q.task_done()
+    
+    def _write_atomic(self, path: str, payload: bytes):
+        """先写入临时文件再原子替换目标文件，避免写入中断导致文件损坏"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp创建的文件仅所有者可读写，恢复为普通数据文件的权限
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
     
     # ID映射相关方法 - 新增
+    def _rebuild_display_index(self):
+        """根据ID映射重建展示ID反向索引"""
+        self._display_index = {
+            display_id: (real_id, id_type)
+            for id_type in ("users", "groups")
+            for real_id, display_id in self.id_mappings.get(id_type, {}).items()
+        }
+    
     def _generate_display_id(self, id_type: str) -> str:
         """生成唯一的展示ID"""
         prefix = "U" if id_type == "users" else "G"
         while True:
             # 生成6位数字ID
-            random_id = ''.join(random.choices(string.digits, k=6))
-            display_id = f"{prefix}{random_id}"
-            
-            # 确保ID不重复
-            is_unique = True
-            for real_id, disp_id in self.id_mappings[id_type].items():
-                if disp_id == display_id:
-                    is_unique = False
-                    break
+            display_id = f"{prefix}{random.randrange(1000000):06d}"
             
-            if is_unique:
+            # 确保ID不重复：前缀区分类型，查反向索引即可
+            if display_id not in self._display_index:
                 return display_id
     
     def get_display_id(self, real_id: str, id_type: str) -> str:
         """获取展示ID，如果不存在则生成一个"""
-        if id_type not in ["users", "groups"]:
+        if id_type not in ID_TYPES:
             self.logger.error(f"无效的ID类型: {id_type}")
             return "未知ID"
         
         if real_id not in self.id_mappings[id_type]:
             display_id = self._generate_display_id(id_type)
             self.id_mappings[id_type][real_id] = display_id
-            self._save_data()
-            self.logger.debug(f"为{id_type[:-1]} {real_id} 生成展示ID: {display_id}")
+            self._display_index[display_id] = (real_id, id_type)
+            self._save_data("id_mappings")
+            self.logger.debug("为%s %s 生成展示ID: %s", id_type[:-1], real_id, display_id)
             return display_id
         
         return self.id_mappings[id_type][real_id]
     
+    def get_display_ids(self, real_ids, id_type: str) -> Dict[str, str]:
+        """批量获取展示ID，缺失的统一生成后只保存一次"""
+        if id_type not in ID_TYPES:
+            self.logger.error(f"无效的ID类型: {id_type}")
+            return {real_id: "未知ID" for real_id in real_ids}
+        
+        mapping = self.id_mappings[id_type]
+        result = {}
+        created = False
+        for real_id in real_ids:
+            display_id = mapping.get(real_id)
+            if display_id is None:
+                display_id = self._generate_display_id(id_type)
+                mapping[real_id] = display_id
+                self._display_index[display_id] = (real_id, id_type)
+                created = True
+            result[real_id] = display_id
+        
+        if created:
+            self._save_data("id_mappings")
+        return result
+    
     def get_user_display_id(self, user_openid: str) -> str:
         """获取用户的展示ID"""
         return self.get_display_id(user_openid, "users")
@@ -183,26 +377,25 @@ class StatsManager:
         Returns:
             Tuple[real_id, id_type]: 真实ID和类型("users"或"groups")
         """
-        # 先检查用户映射
-        for real_id, disp_id in self.id_mappings["users"].items():
-            if disp_id == display_id:
-                return real_id, "users"
-        
-        # 再检查群组映射
-        for real_id, disp_id in self.id_mappings["groups"].items():
-            if disp_id == display_id:
-                return real_id, "groups"
-        
-        return None, None
+        return self._display_index.get(display_id, (None, None))
     
     # 时间相关辅助方法 - 新增
     def _get_time_keys(self, timestamp: Optional[float] = None) -> Tuple[str, str, str]:
-        """获取时间戳对应的日/周/月键名"""
+        """获取时间戳对应的日/周/月键名，未指定时间戳时返回当前键名（缓存到当天午夜）"""
         if timestamp is None:
-            timestamp = time.time()
-        
-        dt = datetime.fromtimestamp(timestamp)
-        
+            now = time.time()
+            if now >= self._time_keys_expires:
+                dt = datetime.fromtimestamp(now)
+                self._time_keys = self._format_time_keys(dt)
+                midnight = (dt + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+                self._time_keys_expires = midnight.timestamp()
+            return self._time_keys
+        
+        return self._format_time_keys(datetime.fromtimestamp(timestamp))
+    
+    @staticmethod
+    def _format_time_keys(dt: datetime) -> Tuple[str, str, str]:
+        """格式化日/周/月键名"""
         # 日期格式：YYYY-MM-DD
         daily_key = dt.strftime("%Y-%m-%d")
         
@@ -214,73 +407,91 @@ class StatsManager:
         
         return daily_key, weekly_key, monthly_key
     
-    def _ensure_time_stats_structure(self, time_key: str, time_type: str):
-        """确保时间段统计结构存在"""
-        if time_key not in self.time_stats[time_type]:
-            self.time_stats[time_type][time_key] = {
-                "commands": {},
-                "groups": {},
-                "users": {},
+    def get_current_time_keys(self) -> Tuple[str, str, str]:
+        """获取当前时间对应的日/周/月键名"""
+        return self._get_time_keys()
+    
+    def _ensure_time_stats_structure(self, time_key: str, time_type: str) -> dict:
+        """确保时间段统计结构存在，并返回该时间段的统计数据"""
+        bucket = self.time_stats[time_type].get(time_key)
+        if bucket is None:
+            bucket = self.time_stats[time_type][time_key] = {
+                "commands": Counter(),
+                "groups": Counter(),
+                "users": Counter(),
                 "total": 0
             }
+        return bucket
+    
+    @staticmethod
+    def _count_in_bucket(bucket: dict, command: str, user_openid: Optional[str], group_openid: Optional[str]):
+        """在一个统计数据中累加命令、用户和群组计数"""
+        bucket["commands"][command] += 1
+        if user_openid:
+            bucket["users"][user_openid] += 1
+        if group_openid:
+            bucket["groups"][group_openid] += 1
     
     # 群组相关方法
     def add_group(self, group_openid: str, name: str = None, op_member_openid: str = None):
         """添加或更新群组信息"""
+        group_openid = sys.intern(group_openid)
         current_time = time.time()
         
         if group_openid not in self.groups:
             self.groups[group_openid] = {
                 "join_time": current_time,
-                "members": [],
+                "members": set(),
                 "last_active": current_time,
                 "added_by": op_member_openid
             }
             self.logger.info(f"添加新群组: {group_openid}")
+            # 新群组分配展示ID，已有群组的展示ID在首次展示时按需生成
+            self.get_group_display_id(group_openid)
         else:
             self.groups[group_openid]["last_active"] = current_time
         
-        # 确保群组有展示ID - 新增
-        self.get_group_display_id(group_openid)
-        
-        self._save_data()
+        self._save_data("groups")
         return self.groups[group_openid]
     
     def remove_group(self, group_openid: str):
-        """移除群组"""
-        if group_openid in self.groups:
-            del self.groups[group_openid]
-            self.logger.info(f"移除群组: {group_openid}")
-            self._save_data()
-            return True
-        return False
+        """移除群组，并从各成员的群组集合中移除该群"""
+        group = self.groups.pop(group_openid, None)
+        if group is None:
+            return False
+        for user_openid in group.get("members", ()):
+            user = self.users.get(user_openid)
+            if user is not None:
+                user["groups"].discard(group_openid)
+        self.logger.info(f"移除群组: {group_openid}")
+        self._save_data("groups", "users")
+        return True
     
     def get_group(self, group_openid: str) -> Optional[dict]:
         """获取群组信息"""
         return self.groups.get(group_openid)
     
-    def get_all_groups(self) -> Dict[str, dict]:
-        """获取所有群组信息"""
-        return self.groups
+    def get_all_groups(self) -> Mapping[str, dict]:
+        """获取所有群组信息（只读视图）"""
+        return MappingProxyType(self.groups)
     
     def add_user_to_group(self, group_openid: str, user_openid: str):
         """将用户添加到群组成员列表"""
+        group_openid = sys.intern(group_openid)
+        user_openid = sys.intern(user_openid)
         if group_openid in self.groups:
-            # 更新群组的成员列表
-            if user_openid not in self.groups[group_openid]["members"]:
-                self.groups[group_openid]["members"].append(user_openid)
-                self.logger.debug(f"将用户 {user_openid} 添加到群组 {group_openid}")
+            # 更新群组的成员集合
+            members = self.groups[group_openid]["members"]
+            if user_openid not in members:
+                members.add(user_openid)
+                self.logger.debug("将用户 %s 添加到群组 %s", user_openid, group_openid)
                 
-                # 同时更新用户的群组列表
+                # 同时更新用户的群组集合
                 if user_openid in self.users:
-                    if "groups" not in self.users[user_openid]:
-                        self.users[user_openid]["groups"] = []
-                    
-                    if group_openid not in self.users[user_openid]["groups"]:
-                        self.users[user_openid]["groups"].append(group_openid)
-                        self.logger.debug(f"将群组 {group_openid} 添加到用户 {user_openid} 的群组列表")
+                    self.users[user_openid].setdefault("groups", set()).add(group_openid)
+                    self.logger.debug("将群组 %s 添加到用户 %s 的群组列表", group_openid, user_openid)
                 
-                self._save_data()
+                self._save_data("groups", "users")
                 return True
         return False
     
@@ -290,19 +501,19 @@ class StatsManager:
         
         # 从群组的成员列表中移除用户
         if group_openid in self.groups and user_openid in self.groups[group_openid]["members"]:
-            self.groups[group_openid]["members"].remove(user_openid)
-            self.logger.debug(f"从群组 {group_openid} 移除用户 {user_openid}")
+            self.groups[group_openid]["members"].discard(user_openid)
+            self.logger.debug("从群组 %s 移除用户 %s", group_openid, user_openid)
             is_updated = True
         
         # 从用户的群组列表中移除群组
         if user_openid in self.users and "groups" in self.users[user_openid]:
             if group_openid in self.users[user_openid]["groups"]:
-                self.users[user_openid]["groups"].remove(group_openid)
-                self.logger.debug(f"从用户 {user_openid} 的群组列表中移除群组 {group_openid}")
+                self.users[user_openid]["groups"].discard(group_openid)
+                self.logger.debug("从用户 %s 的群组列表中移除群组 %s", user_openid, group_openid)
                 is_updated = True
         
         if is_updated:
-            self._save_data()
+            self._save_data("groups", "users")
             return True
         
         return False
@@ -310,154 +521,124 @@ class StatsManager:
     def get_group_members(self, group_openid: str) -> List[str]:
         """获取群组所有成员ID"""
         if group_openid in self.groups:
-            return self.groups[group_openid]["members"]
+            return list(self.groups[group_openid]["members"])
         return []
     
     # 用户相关方法
     def add_user(self, user_openid: str, name: str = None, avatar: str = None):
         """添加或更新用户信息"""
+        user_openid = sys.intern(user_openid)
         current_time = time.time()
         
         if user_openid not in self.users:
             self.users[user_openid] = {
                 "first_seen": current_time,
                 "last_active": current_time,
-                "groups": []
+                "groups": set()
             }
             self.logger.info(f"添加新用户: {user_openid}")
+            # 新用户分配展示ID，已有用户的展示ID在首次展示时按需生成
+            self.get_user_display_id(user_openid)
         else:
             self.users[user_openid]["last_active"] = current_time
             if avatar:
                 self.users[user_openid]["avatar"] = avatar
         
-        # 确保用户有展示ID - 新增
-        self.get_user_display_id(user_openid)
-        
-        self._save_data()
+        self._save_data("users")
         return self.users[user_openid]
     
     def get_user(self, user_openid: str) -> Optional[dict]:
         """获取用户信息"""
         return self.users.get(user_openid)
     
-    def get_all_users(self) -> Dict[str, dict]:
-        """获取所有用户信息"""
-        return self.users
+    def get_all_users(self) -> Mapping[str, dict]:
+        """获取所有用户信息（只读视图）"""
+        return MappingProxyType(self.users)
     
     def update_user_avatar(self, user_openid: str, avatar_url: str):
         """更新用户头像"""
         if user_openid in self.users:
             self.users[user_openid]["avatar"] = avatar_url
-            self._save_data()
+            self._save_data("users")
             return True
         return False
     
     # 统计相关方法
     def log_command(self, command: str, user_openid: str = None, group_openid: str = None):
         """记录命令使用"""
-        current_time = time.time()
-        
-        # 更新命令计数
-        if command not in self.usage_stats["commands"]:
-            self.usage_stats["commands"][command] = 0
-        self.usage_stats["commands"][command] += 1
-        
-        # 更新用户和群组活跃度
         if user_openid:
-            if user_openid not in self.usage_stats["users"]:
-                self.usage_stats["users"][user_openid] = 0
-            self.usage_stats["users"][user_openid] += 1
-            
+            user_openid = sys.intern(user_openid)
         if group_openid:
-            if group_openid not in self.usage_stats["groups"]:
-                self.usage_stats["groups"][group_openid] = 0
-            self.usage_stats["groups"][group_openid] += 1
+            group_openid = sys.intern(group_openid)
         
+        # 更新命令、用户和群组计数
+        self._count_in_bucket(self.usage_stats, command, user_openid, group_openid)
         self.usage_stats["total_messages"] += 1
+        self._total_commands += 1
         
-        # 更新时间段统计 - 新增
-        daily_key, weekly_key, monthly_key = self._get_time_keys(current_time)
-        
-        # 更新日统计
-        self._ensure_time_stats_structure(daily_key, "daily")
-        daily_stats = self.time_stats["daily"][daily_key]
-        
-        if command not in daily_stats["commands"]:
-            daily_stats["commands"][command] = 0
-        daily_stats["commands"][command] += 1
-        
+        # 更新活跃排行缓存
         if user_openid:
-            if user_openid not in daily_stats["users"]:
-                daily_stats["users"][user_openid] = 0
-            daily_stats["users"][user_openid] += 1
-        
+            self._update_top_cache("users", user_openid, self.usage_stats["users"][user_openid])
         if group_openid:
-            if group_openid not in daily_stats["groups"]:
-                daily_stats["groups"][group_openid] = 0
-            daily_stats["groups"][group_openid] += 1
-        
-        daily_stats["total"] += 1
-        
-        # 更新周统计
-        self._ensure_time_stats_structure(weekly_key, "weekly")
-        weekly_stats = self.time_stats["weekly"][weekly_key]
+            self._update_top_cache("groups", group_openid, self.usage_stats["groups"][group_openid])
         
-        if command not in weekly_stats["commands"]:
-            weekly_stats["commands"][command] = 0
-        weekly_stats["commands"][command] += 1
+        # 更新日/周/月统计
+        for time_type, time_key in zip(("daily", "weekly", "monthly"), self._get_time_keys()):
+            bucket = self._ensure_time_stats_structure(time_key, time_type)
+            self._count_in_bucket(bucket, command, user_openid, group_openid)
+            bucket["total"] += 1
         
-        if user_openid:
-            if user_openid not in weekly_stats["users"]:
-                weekly_stats["users"][user_openid] = 0
-            weekly_stats["users"][user_openid] += 1
-        
-        if group_openid:
-            if group_openid not in weekly_stats["groups"]:
-                weekly_stats["groups"][group_openid] = 0
-            weekly_stats["groups"][group_openid] += 1
-        
-        weekly_stats["total"] += 1
-        
-        # 更新月统计
-        self._ensure_time_stats_structure(monthly_key, "monthly")
-        monthly_stats = self.time_stats["monthly"][monthly_key]
-        
-        if command not in monthly_stats["commands"]:
-            monthly_stats["commands"][command] = 0
-        monthly_stats["commands"][command] += 1
-        
-        if user_openid:
-            if user_openid not in monthly_stats["users"]:
-                monthly_stats["users"][user_openid] = 0
-            monthly_stats["users"][user_openid] += 1
-        
-        if group_openid:
-            if group_openid not in monthly_stats["groups"]:
-                monthly_stats["groups"][group_openid] = 0
-            monthly_stats["groups"][group_openid] += 1
-        
-        monthly_stats["total"] += 1
-        
-        # 检查并清理过期的月统计数据
-        # 当添加新的月份数据时，触发清理
-        if monthly_key not in self.time_stats["monthly"] or len(self.time_stats["monthly"]) > STATS_MAX_MONTHS:
+        # 任一时间段数超过保留数量时清理过期的时间统计数据
+        if any(len(self.time_stats[time_type]) > max_keys for time_type, max_keys in TIME_STATS_RETENTION.items()):
             self.cleanup_time_stats()
         
-        self._save_data()
+        self._save_data("usage_stats", "time_stats")
+    
+    def get_command_stats(self) -> Mapping[str, int]:
+        """获取命令使用统计（只读视图）"""
+        return MappingProxyType(self.usage_stats["commands"])
+    
+    def get_total_commands(self) -> int:
+        """获取命令使用总数"""
+        return self._total_commands
+    
+    def _update_top_cache(self, kind: str, entity_id: str, count: int):
+        """计数更新后增量维护已缓存的排行，每个排行只需O(K)"""
+        for (cached_kind, limit), top in self._top_cache.items():
+            if cached_kind != kind:
+                continue
+            
+            for i, (top_id, _) in enumerate(top):
+                if top_id == entity_id:
+                    top[i] = (entity_id, count)
+                    break
+            else:
+                # 不在排行中：排行未满时加入，否则仅在超过末位时替换末位
+                if len(top) < limit:
+                    top.append((entity_id, count))
+                elif count > top[-1][1]:
+                    top[-1] = (entity_id, count)
+                else:
+                    continue
+            
+            top.sort(key=itemgetter(1), reverse=True)
     
-    def get_command_stats(self) -> Dict[str, int]:
-        """获取命令使用统计"""
-        return self.usage_stats["commands"]
+    def _get_most_active(self, kind: str, limit: int) -> List[tuple]:
+        """获取指定类型计数最高的前limit项，结果会被缓存"""
+        key = (kind, limit)
+        top = self._top_cache.get(key)
+        if top is None:
+            top = heapq.nlargest(limit, self.usage_stats[kind].items(), key=itemgetter(1))
+            self._top_cache[key] = top
+        return list(top)
     
     def get_most_active_groups(self, limit: int = 10) -> List[tuple]:
         """获取最活跃的群组"""
-        groups = [(gid, count) for gid, count in self.usage_stats["groups"].items()]
-        return sorted(groups, key=lambda x: x[1], reverse=True)[:limit]
+        return self._get_most_active("groups", limit)
     
     def get_most_active_users(self, limit: int = 10) -> List[tuple]:
         """获取最活跃的用户"""
-        users = [(uid, count) for uid, count in self.usage_stats["users"].items()]
-        return sorted(users, key=lambda x: x[1], reverse=True)[:limit]
+        return self._get_most_active("users", limit)
     
     # 时间段统计方法 - 新增
     def get_daily_stats(self, date_str: Optional[str] = None) -> dict:
@@ -526,7 +707,7 @@ class StatsManager:
         if user_openid in self.users:
             # 不完全删除用户数据，只标记状态
             self.users[user_openid]["is_friend"] = False
-            self._save_data()
+            self._save_data("users")
             return True
         return False
 
@@ -5,47 +5,51 @@ import hashlib
 import hmac
 import base64
 import asyncio
+import functools
 from aiohttp import web
-import binascii
 from config import BOT_APPSECRET, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH
 from event_handler import event_handler
 
+# 优先使用 orjson 解析事件，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # 配置日志
 logger = logging.getLogger("webhook_server")
 
+def _expand_seed(secret, size):
+    """将密钥重复扩展并截取到种子长度"""
+    return (secret * (size // len(secret) + 1))[:size].encode('utf-8')
+
 # 尝试导入 ed25519 库，如果失败则尝试使用 nacl 库
+# 签名密钥只依赖密钥本身，同一密钥只生成一次
 try:
     import ed25519
     logger.info("使用 ed25519 库进行签名验证")
     
+    @functools.lru_cache(maxsize=None)
+    def _signing_key(secret):
+        return ed25519.SigningKey(_expand_seed(secret, ed25519.SEED_SIZE))
+    
     def generate_signature(secret, message):
         """使用 ed25519 库生成签名"""
-        while len(secret) < ed25519.SEED_SIZE:
-            secret = secret + secret
-        secret = secret[:ed25519.SEED_SIZE]
-        signing_key = ed25519.SigningKey(secret.encode('utf-8'))
-        signature = signing_key.sign(message.encode('utf-8'))
-        return binascii.hexlify(signature).decode('utf-8')
+        return _signing_key(secret).sign(message.encode('utf-8')).hex()
         
 except ImportError:
     try:
         import nacl.signing
         logger.info("使用 nacl 库进行签名验证")
         
+        @functools.lru_cache(maxsize=None)
+        def _signing_key(secret):
+            return nacl.signing.SigningKey(_expand_seed(secret, 32))
+        
         def generate_signature(secret, message):
             """使用 nacl 库生成签名"""
-            # 准备密钥，确保长度正确
-            while len(secret) < 32:
-                secret = secret + secret
-            secret = secret[:32]
-            
-            # 从种子创建签名密钥
-            seed = secret.encode('utf-8')
-            signing_key = nacl.signing.SigningKey(seed)
-            
-            # 签名消息
-            signature = signing_key.sign(message.encode('utf-8')).signature
-            return binascii.hexlify(signature).decode('utf-8')
+            return _signing_key(secret).sign(message.encode('utf-8')).signature.hex()
     except ImportError:
         logger.error("无法导入 ed25519 或 nacl 库，请安装其中一个: pip install ed25519 或 pip install pynacl")
         raise ImportError("需要 ed25519 或 nacl 库来处理签名验证")
@@ -79,7 +83,7 @@ class WebhookServer:
             headers = request.headers
             
             # 检查是否是验证请求
-            payload = json.loads(body_data)
+            payload = _json_loads(body_data)
             if "op" in payload and payload["op"] == 13:
                 logger.info("收到Webhook验证请求")
                 return await self._handle_validation(payload)
@@ -1,13 +1,30 @@
 import json
 import asyncio
 import websockets
-import time
 import logging
 import random
 from config import BOT_APPID, BOT_TOKEN
 from event_handler import event_handler
 from auth import auth_manager  # 保留auth_manager用于获取动态token
 
+# 优先使用 orjson 解析事件，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Python 3.11+ 使用 asyncio.timeout 在当前任务内计时，不像 wait_for 那样为每次调用创建新任务
+if hasattr(asyncio, "timeout"):
+    async def _wait_for(aw, timeout):
+        async with asyncio.timeout(timeout):
+            return await aw
+else:
+    _wait_for = asyncio.wait_for
+
+# 心跳确认帧内容固定，直接比较，无需解析
+_HEARTBEAT_ACK_FRAMES = frozenset({'{"op":11}', b'{"op":11}'})
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("websocket_client")
@@ -25,9 +42,18 @@ class WebSocketClient:
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 10
         self.max_retry_interval = 60  # 最大重试间隔（秒）
+        self.base_retry_interval = 1  # 最小重试间隔（秒）
+        self.retry_interval = self.base_retry_interval  # 上一次的重试间隔，用于计算下一次的间隔
     
     async def connect(self):
-        """连接到WebSocket网关"""
+        """连接到WebSocket网关并保持连接，连接断开后按退避间隔重连，达到最大重连次数后返回"""
+        while True:
+            await self._connect_once()
+            if not await self.reconnect():
+                return
+    
+    async def _connect_once(self):
+        """建立一次连接并监听消息，直到连接断开"""
         try:
             # 如果已存在心跳任务，先取消
             if self.heartbeat_task and not self.heartbeat_task.done():
@@ -39,31 +65,30 @@ class WebSocketClient:
                 self.heartbeat_task = None
             
             # 设置连接超时
-            self.ws = await asyncio.wait_for(
+            self.ws = await _wait_for(
                 websockets.connect(
                     self.gateway_url,
                     ping_interval=30,  # 更频繁的ping以保持连接
                     ping_timeout=10,
-                    close_timeout=10
+                    close_timeout=10,
+                    compression=None  # 网关消息均为小JSON，不协商permessage-deflate
                 ),
                 timeout=20
             )
             self.connected = True
             self.reconnect_attempts = 0  # 重置重连计数器
+            self.retry_interval = self.base_retry_interval
             logger.info("WebSocket连接已建立")
             
             # 接收Hello消息，添加超时
             try:
-                hello_message = await asyncio.wait_for(self.ws.recv(), timeout=15)
-                hello_data = json.loads(hello_message)
+                hello_message = await _wait_for(self.ws.recv(), timeout=15)
+                hello_data = _json_loads(hello_message)
                 
                 if hello_data["op"] == 10:  # Hello
                     self.heartbeat_interval = hello_data["d"]["heartbeat_interval"]
                     logger.info(f"收到Hello消息，心跳间隔: {self.heartbeat_interval}ms")
                     
-                    # 启动心跳任务
-                    self.heartbeat_task = asyncio.create_task(self.heartbeat_loop())
-                    
                     # 判断是否有会话ID和序列号，如果有则尝试恢复会话，否则重新鉴权
                     if self.session_id and self.last_sequence:
                         try:
@@ -75,23 +100,23 @@ class WebSocketClient:
                         # 发送鉴权消息
                         await self.identify()
                     
+                    # 鉴权消息发出后再启动心跳任务（即时任务工厂下任务创建时就会开始执行）
+                    self.heartbeat_task = asyncio.create_task(self.heartbeat_loop())
+                    
                     # 开始监听消息
                     await self.listen_messages()
                 else:
                     logger.error(f"预期接收Hello消息，但接收到: {hello_data}")
-                    await self.reconnect()
+                    self.connected = False
             except asyncio.TimeoutError:
                 logger.error("等待Hello消息超时")
                 self.connected = False
-                await self.reconnect()
         except asyncio.TimeoutError:
             logger.error("WebSocket连接超时")
             self.connected = False
-            await self.reconnect()
         except Exception as e:
             logger.error(f"WebSocket连接失败: {e}")
             self.connected = False
-            await self.reconnect()
     
     async def identify(self):
         """发送鉴权消息"""
@@ -116,7 +141,7 @@ class WebSocketClient:
                 }
             }
             
-            await asyncio.wait_for(
+            await _wait_for(
                 self.ws.send(json.dumps(identify_payload)),
                 timeout=10
             )
@@ -124,11 +149,9 @@ class WebSocketClient:
         except asyncio.TimeoutError:
             logger.error("发送鉴权消息超时")
             self.connected = False
-            await self.reconnect()
         except Exception as e:
             logger.error(f"发送鉴权消息失败: {e}")
             self.connected = False
-            await self.reconnect()
     
     async def heartbeat_loop(self):
         """心跳循环"""
@@ -144,18 +167,20 @@ class WebSocketClient:
             logger.error(f"心跳循环异常: {e}")
             if self.connected:
                 self.connected = False
-                asyncio.create_task(self.reconnect())
+                # 关闭连接使监听循环结束，由connect()负责重连
+                try:
+                    await _wait_for(self.ws.close(), timeout=5)
+                except Exception:
+                    pass
     
     async def send_heartbeat(self):
         """发送心跳"""
-        heartbeat_payload = {
-            "op": 1,
-            "d": self.last_sequence
-        }
+        # 心跳帧结构固定，直接拼接序列号；网关要求文本帧，因此使用str而不是bytes
+        sequence = "null" if self.last_sequence is None else self.last_sequence
         
         try:
-            await asyncio.wait_for(
-                self.ws.send(json.dumps(heartbeat_payload)),
+            await _wait_for(
+                self.ws.send(f'{{"op":1,"d":{sequence}}}'),
                 timeout=10
             )
             logger.debug("已发送心跳")
@@ -172,11 +197,13 @@ class WebSocketClient:
         """监听并处理消息"""
         try:
             while self.connected:
+                # 每条消息前让出一次事件循环，消息密集时心跳等任务也能及时执行
+                await asyncio.sleep(0)
                 try:
                     # 添加消息接收超时
-                    message = await asyncio.wait_for(self.ws.recv(), timeout=60)
+                    message = await _wait_for(self.ws.recv(), timeout=60)
                     # 处理消息时添加超时保护
-                    await asyncio.wait_for(self.process_message(message), timeout=30)
+                    await _wait_for(self.process_message(message), timeout=30)
                 except asyncio.TimeoutError as e:
                     if "recv" in str(e):
                         logger.warning("超过60秒未收到消息，发送额外心跳保活")
@@ -184,6 +211,7 @@ class WebSocketClient:
                             await self.send_heartbeat()
                         except:
                             logger.error("发送保活心跳失败")
+                            self.connected = False
                             break
                     else:
                         logger.error(f"处理消息超时: {e}")
@@ -191,17 +219,18 @@ class WebSocketClient:
         except websockets.ConnectionClosed as e:
             logger.warning(f"WebSocket连接已关闭: {e}")
             self.connected = False
-            # 尝试重新连接
-            await self.reconnect()
         except Exception as e:
             logger.error(f"监听消息异常: {e}")
             self.connected = False
-            await self.reconnect()
     
     async def process_message(self, message):
         """处理接收到的消息"""
+        if message in _HEARTBEAT_ACK_FRAMES:
+            logger.debug("收到心跳确认")
+            return
+        
         try:
-            data = json.loads(message)
+            data = _json_loads(message)
             op_code = data.get("op", None)
             
             # 更新最后的序列号，用于心跳和重连
@@ -210,15 +239,14 @@ class WebSocketClient:
             
             if op_code == 0:  # Dispatch
                 # 为每个事件设置独立的超时保护
-                await asyncio.wait_for(self.handle_dispatch(data), timeout=20)
+                await _wait_for(self.handle_dispatch(data), timeout=20)
             elif op_code == 7:  # Reconnect required
                 logger.info("收到服务器重连请求，准备重新连接")
                 self.connected = False
-                await self.reconnect()
             elif op_code == 11:  # Heartbeat ACK
                 logger.debug("收到心跳确认")
             else:
-                logger.info(f"收到未处理的操作码: {op_code}")
+                logger.info("收到未处理的操作码: %s", op_code)
         except asyncio.TimeoutError:
             logger.error("处理消息超时")
         except Exception as e:
@@ -231,7 +259,7 @@ class WebSocketClient:
             event_data = data.get("d", {})
             
             if event_type:
-                logger.info(f"收到事件: {event_type}")
+                logger.debug("收到事件: %s", event_type)
                 
                 # 处理会话ID (用于断线重连)
                 if event_type == "READY":
@@ -278,7 +306,7 @@ class WebSocketClient:
             }
             
             logger.info(f"正在尝试恢复连接，会话ID: {self.session_id}, 序列号: {self.last_sequence}")
-            await asyncio.wait_for(
+            await _wait_for(
                 self.ws.send(json.dumps(resume_payload)),
                 timeout=10
             )
@@ -286,11 +314,12 @@ class WebSocketClient:
             
             # 等待服务器确认恢复
             try:
-                # 最多等待10秒看是否收到RESUMED事件
-                response_start_time = time.time()
-                while time.time() - response_start_time < 10:
-                    message = await asyncio.wait_for(self.ws.recv(), timeout=5)
-                    data = json.loads(message)
+                # 最多等待10秒看是否收到RESUMED事件，单次接收的等待不超过剩余时间
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + 10
+                while (remaining := deadline - loop.time()) > 0:
+                    message = await _wait_for(self.ws.recv(), timeout=min(5, remaining))
+                    data = _json_loads(message)
                     
                     # 如果收到RESUMED事件，表示恢复成功
                     if data.get("op") == 0 and data.get("t") == "RESUMED":
@@ -319,63 +348,47 @@ class WebSocketClient:
         except asyncio.TimeoutError:
             logger.error("发送恢复连接消息超时")
             self.connected = False
-            await self.reconnect()
         except Exception as e:
             logger.error(f"发送恢复连接消息失败: {e}")
             self.connected = False
-            await self.reconnect()
     
-    async def reconnect(self):
-        """重新连接WebSocket"""
+    async def reconnect(self) -> bool:
+        """清理已断开的连接并等待重试间隔，返回False表示已达到最大重连次数"""
+        # 取消心跳任务
+        if self.heartbeat_task and not self.heartbeat_task.done():
+            self.heartbeat_task.cancel()
+            try:
+                await self.heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        
+        # 安全关闭WebSocket连接
+        if self.ws:
+            try:
+                # 使用try-except安全地关闭连接，不依赖于.open属性检查
+                await _wait_for(self.ws.close(), timeout=5)
+            except Exception as e:
+                logger.debug(f"关闭WebSocket时发生异常: {e}")
+        
+        # 确保ws对象被清除
+        self.ws = None
+        self.connected = False
+        
         if self.reconnect_attempts >= self.max_reconnect_attempts:
             logger.error(f"已达到最大重连次数 ({self.max_reconnect_attempts})，停止重连")
-            return
+            return False
         
         self.reconnect_attempts += 1
         
-        # 计算重试间隔（指数退避策略）
-        retry_interval = min(2 ** self.reconnect_attempts + random.uniform(0, 1), self.max_retry_interval)
+        # 计算重试间隔（去相关抖动的指数退避：在最小间隔与上次间隔的3倍之间随机取值）
+        self.retry_interval = min(
+            self.max_retry_interval,
+            random.uniform(self.base_retry_interval, self.retry_interval * 3)
+        )
         
-        logger.info(f"准备重新连接，第 {self.reconnect_attempts} 次尝试，等待 {retry_interval:.2f} 秒...")
-        
-        try:
-            # 取消心跳任务
-            if self.heartbeat_task and not self.heartbeat_task.done():
-                self.heartbeat_task.cancel()
-                try:
-                    await self.heartbeat_task
-                except asyncio.CancelledError:
-                    pass
-            
-            # 安全关闭WebSocket连接
-            if self.ws:
-                try:
-                    # 使用try-except安全地关闭连接，不依赖于.open属性检查
-                    await asyncio.wait_for(self.ws.close(), timeout=5)
-                except Exception as e:
-                    logger.debug(f"关闭WebSocket时发生异常: {e}")
-            
-            # 确保ws对象被清除
-            self.ws = None
-            self.connected = False
-            
-            # 等待一段时间再重连
-            await asyncio.sleep(retry_interval)
-            
-            # 重新建立连接
-            await self.connect()
-            
-            # 注意：connect()成功后会自动调用identify()重新鉴权
-            
-        except Exception as e:
-            logger.error(f"重新连接失败: {e}")
-            self.connected = False
-            
-            # 增加额外延迟以避免快速失败的循环
-            await asyncio.sleep(1)
-            
-            # 递归调用自身进行下一次重连
-            await self.reconnect()
+        logger.info(f"准备重新连接，第 {self.reconnect_attempts} 次尝试，等待 {self.retry_interval:.2f} 秒...")
+        await asyncio.sleep(self.retry_interval)
+        return True
     
     async def close(self):
         """关闭WebSocket连接"""